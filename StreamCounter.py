@@ -1,27 +1,155 @@
+import time
+STARTUP_STARTED = time.perf_counter()  # Taken before the other imports for --startup-timing
+
 import tkinter as tk
-from tkinter import ttk, colorchooser, font, filedialog, messagebox
-from PIL import Image, ImageTk
+from tkinter import ttk, colorchooser, filedialog, messagebox, simpledialog
+from tkinter import font as tkfont
+from collections import deque
+import argparse
 import json
 import os
 import sys
-from pynput import keyboard
 import threading
+import traceback
+from pynput import keyboard
 import webbrowser
+from background import BackgroundCache, open_image
+from viewer import ViewerRenderer
+from hotkeys import HotkeyTable, HOTKEY_OPS, hotkey_action, counter_commands, modifier_mask, normalize_key
+from key_listener import KeyListener
+from hotkey_trace import TraceWriter
+from command_queue import CommandQueue
+from journal import CounterJournal, write_atomic
+from counter_engine import CounterEngine, COUNTER_FIELDS, VIEWER_FIELDS, ROLLOVER_MODES
+from overlay_server import OverlayServer
+from control_server import ControlServer
+from shared_state import SharedStateWriter
+from text_output import TextFileOutput
+from font_cache import load_font_families
+from font_metrics import FontMetricCache
+from instrumentation import Instrumentation
+from stats_window import StatsWindow
+from viewer_window import ViewerWindow
+from event_history import EventHistory
+
+FRAME_INTERVAL_MS = 16
+RATES_INTERVAL_MS = 1000
+RECENT_WINDOW = 600  # Seconds covered by the "Last 10 min" figure
+HISTORY_SAVE_INTERVAL = 60  # Seconds between history saves while counts are changing
+MAX_COUNTERS_HEIGHT = 420  # Counter controls scroll once they need more room than this
+PROFILE_NEXT_ACTION = "profile_next"  # Global hotkey, shared by all profiles
+PREWARM_DELAY_MS = 500
+ANIMATION_RESIZE_DELAY_MS = 250  # An animated background is rebuilt once resizing pauses this long
+ANIMATION_WRAP_BUDGET_MS = 4  # Time per frame spent turning decoded animation frames into PhotoImages
+
+# Settings written before multiple counters were supported
+LEGACY_SIDES = {"left": 0, "right": 1}
+
+
+def is_counter_action(action):
+    # Counter hotkeys belong to a profile; everything else is global
+    return action.startswith("counter")
+
 
 class StreamCounter:
-    def __init__(self, root):
+    def __init__(self, root, overlay_port=None, base_path=None, control_port=None, record_keys=None):
         self.root = root
         self.root.title("Stream Counter")
         self.root.geometry("800x700")  # Adjusted height for combined viewer
 
         # Determine the base path for saving settings
-        if getattr(sys, 'frozen', False):
+        if base_path:
+            self.base_path = base_path
+        elif getattr(sys, 'frozen', False):
             self.base_path = os.path.dirname(sys.executable)
         else:
             self.base_path = os.path.dirname(os.path.abspath(__file__))
 
         # Define settings_file before using it
         self.settings_file = os.path.join(self.base_path, "stream_counter_settings.json")
+        # Counter changes are journaled between settings snapshots so a crash loses nothing
+        self.journal = CounterJournal(os.path.join(self.base_path, "stream_counter_journal.jsonl"))
+
+        # All counter and viewer state lives in the engine; the widgets below mirror it
+        self.engine = CounterEngine()
+        self.bg_image = None
+        self.bg_photo = None
+        self.bg_animation = None  # [(PhotoImage, duration_ms)] while an animated background plays
+        self.bg_animation_job = None
+        self.bg_animation_resize_job = None
+        # Animations are decoded and scaled on a worker thread, then wrapped a slice per frame
+        self.bg_animation_loading = None  # (source key, size) being decoded
+        self.decoded_animations = deque()  # (source key, size, frames) from the worker thread
+        self.bg_animation_wrapping = None  # (source key, size, frames) being wrapped in PhotoImages
+        self.bg_cache = BackgroundCache(cache_dir=os.path.join(self.base_path, "bg_cache"))
+        # The decoded background is kept at most source_scale times the largest viewer size
+        self.background_settings = {"source_scale": 2.0}
+        self.viewer_dirty = False
+        self.font_families = None  # Enumerated the first time a font list is opened
+
+        # Hotkey variables (default values for the first two counters)
+        self.hotkeys = {
+            "counter1_increment": {"ctrl": True, "shift": True, "alt": False, "key": keyboard.Key.f1},
+            "counter1_decrement": {"ctrl": True, "shift": True, "alt": False, "key": keyboard.Key.f2},
+            "counter1_reset": {"ctrl": True, "shift": True, "alt": False, "key": keyboard.Key.f3},
+            "counter2_increment": {"ctrl": True, "shift": True, "alt": False, "key": keyboard.Key.f4},
+            "counter2_decrement": {"ctrl": True, "shift": True, "alt": False, "key": keyboard.Key.f5},
+            "counter2_reset": {"ctrl": True, "shift": True, "alt": False, "key": keyboard.Key.f6},
+            PROFILE_NEXT_ACTION: {"ctrl": False, "shift": False, "alt": False, "key": None},
+        }
+        self.hotkey_labels = {}  # To store labels displaying current hotkeys
+        self.recording_hotkey = None  # To track which hotkey is being recorded
+        self.hotkey_repeat_policy = "ignore"  # "ignore" or "repeat" (fire on OS auto-repeat)
+
+        # Optional local server for OBS browser sources
+        self.overlay_settings = {"enabled": False, "host": "127.0.0.1", "port": 8765}
+        self.overlay_server = None
+
+        # Optional local control socket for scripts and Stream Deck buttons (TCP, or a Unix socket path)
+        self.control_settings = {"enabled": False, "host": "127.0.0.1", "port": 8766, "socket": ""}
+        self.control_server = None
+
+        # Optional detached viewer window for OBS window capture (chroma_key replaces the background)
+        self.viewer_window_settings = {"enabled": False, "borderless": False, "chroma_key": "",
+                                       "geometry": "400x200", "fps": 30, "budget_ms": 8}
+        self.viewer_window = None
+
+        # Optional offscreen render of the viewer to a PNG file (PIL, independent of the Tk widgets)
+        self.image_output_settings = {"enabled": False, "path": "", "width": 1280, "height": 720,
+                                      "transparent": False}
+        self.image_output = None
+
+        # Optional memory-mapped file with the current counts for other local processes
+        self.shared_state_settings = {"enabled": False, "path": ""}
+        self.shared_state = None
+
+        # Optional per-counter text files for OBS text sources (directory defaults to text_output/)
+        self.text_output_settings = {"enabled": False, "directory": "", "debounce_ms": 100}
+        self.text_output = None
+
+        # Timestamped history of count changes (for rolling rates) and automatic resets
+        self.history = EventHistory()
+        self.history_file = os.path.join(self.base_path, "stream_counter_history.bin")
+        self.rollover_settings = {"day_start_hour": 0, "session_gap_hours": 4}
+        self.rollover_day = None
+        self.last_active = 0
+        self.session_started = 0  # When the last session rollover happened
+        self.history_dirty = False
+        self.history_saved = time.time()
+
+        # Named profiles: the active one lives in the engine and widgets, the others as saved
+        # snapshots ({"counters", "viewer", "hotkeys"}) whose fonts and backgrounds are pre-warmed
+        self.profiles = {"Default": None}
+        self.active_profile = "Default"
+        self.snapshot_pending = False  # A profile switch whose settings snapshot is not written yet
+        self.snapshot_scheduled = False
+        self.warm_fonts = {}
+        self.prewarmed = deque()  # (source, size, image) scaled on the worker thread
+        self.prewarm_job = None
+
+        # Load settings from file
+        self.load_settings()
+        self.history.load(self.history_file, self.active_profile)
 
         # Promotional Text at the Top
         promo_frame = ttk.Frame(root)
@@ -32,71 +160,63 @@ class StreamCounter:
         link_label.pack()
         link_label.bind("<Button-1>", lambda e: webbrowser.open("http://autismistic.com"))
 
-        # Main frame to hold both counters and the copy button
-        main_frame = ttk.Frame(root)
-        main_frame.pack(fill="both", expand=False)
-
-        # Left Counter (Original "Deaths")
-        self.left_counter_frame = ttk.LabelFrame(main_frame, text="Counter 1", padding="10")
-        self.left_counter_frame.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-
-        # Copy Settings Button (in the middle, vertically centered)
-        copy_frame = ttk.Frame(main_frame)
+        # Profile selection
+        profile_frame = ttk.Frame(root, padding="5")
+        profile_frame.pack(side="top", fill="x")
+        ttk.Label(profile_frame, text="Profile:").pack(side="left")
+        self.profile_var = tk.StringVar(value=self.active_profile)
+        self.profile_combo = ttk.Combobox(profile_frame, textvariable=self.profile_var, values=list(self.profiles),
+                                          state="readonly", width=20)
+        self.profile_combo.pack(side="left", padx=5)
+        self.profile_combo.bind("<<ComboboxSelected>>", lambda e: self.switch_profile(self.profile_var.get()))
+        ttk.Button(profile_frame, text="New Profile", command=self.new_profile).pack(side="left")
+        ttk.Button(profile_frame, text="Delete Profile", command=self.delete_profile).pack(side="left", padx=5)
+        ttk.Button(profile_frame, text="Set Next Profile Hotkey",
+                   command=lambda: self.start_recording_hotkey(PROFILE_NEXT_ACTION)).pack(side="left")
+        next_profile_label = ttk.Label(profile_frame, text=self.format_hotkey(PROFILE_NEXT_ACTION), font=("Arial", 8))
+        next_profile_label.pack(side="left", padx=5)
+        self.hotkey_labels[PROFILE_NEXT_ACTION] = next_profile_label
+
+        # Scrollable area holding one frame per counter
+        counters_area = ttk.Frame(root)
+        counters_area.pack(fill="x")
+        self.counters_canvas = tk.Canvas(counters_area, highlightthickness=0)
+        counters_scrollbar = ttk.Scrollbar(counters_area, orient="vertical", command=self.counters_canvas.yview)
+        self.counters_canvas.configure(yscrollcommand=counters_scrollbar.set)
+        counters_scrollbar.pack(side="right", fill="y")
+        self.counters_canvas.pack(side="left", fill="x", expand=True)
+
+        # Main frame to hold the counters and the copy button
+        self.main_frame = ttk.Frame(self.counters_canvas)
+        main_frame_id = self.counters_canvas.create_window(0, 0, window=self.main_frame, anchor="nw")
+        self.main_frame.bind("<Configure>", lambda e: self.counters_canvas.configure(
+            scrollregion=self.counters_canvas.bbox("all"), height=min(e.height, MAX_COUNTERS_HEIGHT)))
+        self.counters_canvas.bind("<Configure>", lambda e: self.counters_canvas.itemconfigure(main_frame_id, width=e.width))
+
+        # Copy Settings and Add/Remove Counter Buttons (in the middle, vertically centered)
+        copy_frame = ttk.Frame(self.main_frame)
         copy_frame.grid(row=0, column=1, sticky="nsew", padx=5, pady=10)
         copy_button = ttk.Button(copy_frame, text="Copy Settings -->", command=self.copy_settings)
         copy_button.pack(expand=True)
-
-        # Right Counter ("Deaths Today")
-        self.right_counter_frame = ttk.LabelFrame(main_frame, text="Counter 2 (Deaths Today)", padding="10")
-        self.right_counter_frame.grid(row=0, column=2, sticky="nsew", padx=5, pady=5)
+        ttk.Button(copy_frame, text="Add Counter", command=self.add_counter).pack(expand=True, pady=2)
+        ttk.Button(copy_frame, text="Remove Counter", command=self.remove_counter).pack(expand=True, pady=2)
 
         # Configure grid weights to make counters expand equally
-        main_frame.columnconfigure(0, weight=1)
-        main_frame.columnconfigure(1, weight=0, minsize=100)
-        main_frame.columnconfigure(2, weight=1)
-        main_frame.rowconfigure(0, weight=1)
-
-        # Variables for Left Counter (Original)
-        self.left_label_text = tk.StringVar(value="Deaths:")
-        self.left_count = tk.IntVar(value=0)
-        self.left_bg_color = tk.StringVar(value="#ffffff")
-        self.left_font_color = tk.StringVar(value="#000000")
-        self.left_font_size = tk.IntVar(value=12)
-        self.left_font_family = tk.StringVar(value="Arial")
-        self.left_bg_image = None
-        self.left_bg_photo = None
-        self.left_bg_image_path = tk.StringVar(value="")
-
-        # Variables for Right Counter (Deaths Today)
-        self.right_label_text = tk.StringVar(value="Deaths Today:")
-        self.right_count = tk.IntVar(value=0)
-        self.right_font_color = tk.StringVar(value="#000000")
-        self.right_font_size = tk.IntVar(value=12)
-        self.right_font_family = tk.StringVar(value="Arial")
-        self.right_include_in_viewer = tk.BooleanVar(value=True)  # Checkbox variable
-
-        # Variable for viewer label spacing
-        self.viewer_spacing = tk.IntVar(value=10)  # Default spacing of 10 pixels
-
-        # Hotkey variables (default values)
-        self.hotkeys = {
-            "left_increment": {"ctrl": True, "shift": True, "key": keyboard.Key.f1},
-            "left_decrement": {"ctrl": True, "shift": True, "key": keyboard.Key.f2},
-            "left_reset": {"ctrl": True, "shift": True, "key": keyboard.Key.f3},
-            "right_increment": {"ctrl": True, "shift": True, "key": keyboard.Key.f4},
-            "right_decrement": {"ctrl": True, "shift": True, "key": keyboard.Key.f5},
-            "right_reset": {"ctrl": True, "shift": True, "key": keyboard.Key.f6},
-        }
-        self.hotkey_labels = {}  # To store labels displaying current hotkeys
-        self.recording_hotkey = None  # To track which hotkey is being recorded
-
-        # Load settings from file
-        self.load_settings()
-
-        # Setup Left Counter
-        self.setup_counter(self.left_counter_frame, "left")
-        # Setup Right Counter
-        self.setup_counter(self.right_counter_frame, "right")
+        self.main_frame.columnconfigure(0, weight=1)
+        self.main_frame.columnconfigure(1, weight=0, minsize=100)
+        self.main_frame.columnconfigure(2, weight=1)
+
+        # Per-counter widgets and Tk variables, generated for each counter in the engine
+        self.counter_frames = []
+        self.counter_vars = []
+        self.count_entries = []
+        self.rate_labels = []
+        for index in range(len(self.engine.counters)):
+            self.setup_counter(index)
+
+        # Variables for viewer label spacing and auto-fit
+        self.viewer_spacing = tk.IntVar(value=self.engine.viewer["spacing"])
+        self.viewer_auto_fit = tk.BooleanVar(value=self.engine.viewer["auto_fit"])
 
         # Combined Display Frame (at the bottom)
         self.display_frame = ttk.LabelFrame(root, text="Viewer", padding="10")
@@ -107,246 +227,471 @@ class StreamCounter:
         spacing_frame.pack(fill="x", pady=2)
         ttk.Label(spacing_frame, text="Label Spacing:").pack(side="left")
         ttk.Spinbox(spacing_frame, from_=0, to=100, textvariable=self.viewer_spacing,
-                    command=self.update_display).pack(side="left", padx=5)
+                    command=lambda: self.engine.set_viewer(spacing=self.viewer_spacing.get())).pack(side="left", padx=5)
+        ttk.Checkbutton(spacing_frame, text="Auto-fit Text", variable=self.viewer_auto_fit,
+                        command=lambda: self.engine.set_viewer(auto_fit=self.viewer_auto_fit.get())).pack(side="left")
+        ttk.Button(spacing_frame, text="Latency Stats", command=lambda: StatsWindow(self)).pack(side="right")
+        ttk.Button(spacing_frame, text="Detach Viewer", command=self.toggle_viewer_window).pack(side="right", padx=5)
 
         # Canvas for combined display
         self.display_canvas = tk.Canvas(self.display_frame, highlightthickness=0)
         self.display_canvas.pack(fill="both", expand=True)
 
-        # Frame inside canvas to hold labels
-        self.label_frame = tk.Frame(self.display_canvas, bg=self.left_bg_color.get())
+        # Frame inside canvas to hold labels (the renderer creates one label per counter)
+        self.label_frame = tk.Frame(self.display_canvas, bg=self.engine.viewer["bg_color"])
         self.label_frame_id = self.display_canvas.create_window(0, 0, window=self.label_frame, anchor="center")
-
-        # Labels for text (inside the frame)
-        self.left_display_label = tk.Label(self.label_frame, 
-                                          text=f"{self.left_label_text.get()} {self.left_count.get()}",
-                                          font=(self.left_font_family.get(), self.left_font_size.get()),
-                                          fg=self.left_font_color.get(),
-                                          bg=self.left_bg_color.get())
-        self.left_display_label.pack(pady=self.viewer_spacing.get())
-
-        self.right_display_label = tk.Label(self.label_frame, 
-                                           text=f"{self.right_label_text.get()} {self.right_count.get()}",
-                                           font=(self.right_font_family.get(), self.right_font_size.get()),
-                                           fg=self.right_font_color.get(),
-                                           bg=self.left_bg_color.get())
-        self.right_display_label.pack(pady=self.viewer_spacing.get())
+        self.viewer_renderer = ViewerRenderer(self.display_canvas, self.label_frame)
+        self.font_metrics = FontMetricCache(root)
+        self.display_size = (200, 100)
+        self.display_configured = False  # Backgrounds wait for the canvas's real size
 
         # Bind canvas resize to update the background image and center the label frame
-        self.display_canvas.bind("<Configure>", lambda e: self.update_display())
+        self.display_canvas.bind("<Configure>", self.on_display_configure)
+
+        # From here on every engine change is mirrored into the widgets and the journal
+        self.engine.subscribe(self.on_engine_change)
+        self.engine.subscribe(self.journal_count_change)
+        self.apply_rollover(startup=True)
 
         # Initial update
+        self.load_bg_image()
         self.update_display()
 
+        # Hotkeys queue commands that are applied once per frame
+        self.metrics = Instrumentation(self.root)
+        self.command_queue = CommandQueue()
+        self.root.after(FRAME_INTERVAL_MS, self.process_commands)
+        self.update_rates()
+
         # Start global hotkey listener
-        self.start_hotkey_listener()
+        self.hotkey_table = HotkeyTable(self.hotkey_repeat_policy)
+        self.start_hotkey_listener(record_keys)
+
+        if overlay_port is not None:
+            self.start_overlay_server(self.overlay_settings["host"], overlay_port)
+        elif self.overlay_settings["enabled"]:
+            self.start_overlay_server(self.overlay_settings["host"], self.overlay_settings["port"])
+
+        if self.text_output_settings["enabled"]:
+            self.start_text_output()
+
+        if control_port is not None:
+            self.start_control_server(self.control_settings["host"], control_port, "")
+        elif self.control_settings["enabled"]:
+            self.start_control_server(self.control_settings["host"], self.control_settings["port"],
+                                      self.control_settings["socket"])
+
+        if self.shared_state_settings["enabled"]:
+            self.start_shared_state()
+
+        if self.viewer_window_settings["enabled"]:
+            self.toggle_viewer_window()
+
+        if self.image_output_settings["enabled"]:
+            self.start_image_output()
+
+        self.schedule_prewarm()
 
         # Bind closing event to save settings
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-    def setup_counter(self, frame, side):
+    def setup_counter(self, index):
+        counter = self.engine.counters[index]
+        frame = ttk.LabelFrame(self.main_frame, text=f"Counter {index + 1}", padding="10")
+        # Two counters per row, either side of the copy button column
+        frame.grid(row=index // 2, column=0 if index % 2 == 0 else 2, sticky="nsew", padx=5, pady=5)
+        self.counter_frames.append(frame)
+
         # Variables specific to this counter
-        label_text = self.left_label_text if side == "left" else self.right_label_text
-        count = self.left_count if side == "left" else self.right_count
-        font_color = self.left_font_color if side == "left" else self.right_font_color
-        font_size = self.left_font_size if side == "left" else self.right_font_size
-        font_family = self.left_font_family if side == "left" else self.right_font_family
-
-        # Checkbox for Right Counter (only for side="right")
-        if side == "right":
-            checkbox_frame = ttk.Frame(frame)
-            checkbox_frame.pack(fill="x", pady=2)
-            ttk.Checkbutton(checkbox_frame, text="Include in Viewer?", 
-                           variable=self.right_include_in_viewer, 
-                           command=self.update_display).pack(side="left")
+        variables = {
+            "label_text": tk.StringVar(value=counter.label_text),
+            "count": tk.IntVar(value=counter.count),
+            "font_size": tk.IntVar(value=counter.font_size),
+            "font_family": tk.StringVar(value=counter.font_family),
+            "include_in_viewer": tk.BooleanVar(value=counter.include_in_viewer),
+            "rollover": tk.StringVar(value=counter.rollover),
+        }
+        self.counter_vars.append(variables)
+
+        # Checkbox for including the counter in the viewer
+        checkbox_frame = ttk.Frame(frame)
+        checkbox_frame.pack(fill="x", pady=2)
+        ttk.Checkbutton(checkbox_frame, text="Include in Viewer?",
+                       variable=variables["include_in_viewer"],
+                       command=lambda: self.engine.set_counter(
+                           index, include_in_viewer=variables["include_in_viewer"].get())).pack(side="left")
 
         # Top Frame - Input Boxes
         top_frame = ttk.Frame(frame, padding="10")
         top_frame.pack(fill="x")
 
-        label_entry = ttk.Entry(top_frame, textvariable=label_text)
+        label_entry = ttk.Entry(top_frame, textvariable=variables["label_text"])
         label_entry.pack(side="left", padx=5)
-        label_entry.bind("<KeyRelease>", lambda e: self.update_display())
+        label_entry.bind("<KeyRelease>", lambda e: self.engine.set_counter(
+            index, label_text=variables["label_text"].get()))
 
-        count_entry = ttk.Entry(top_frame, textvariable=count, width=10)
+        count_entry = ttk.Entry(top_frame, textvariable=variables["count"], width=10)
         count_entry.pack(side="left", padx=5)
-        count_entry.bind("<Return>", lambda e: self.update_count_from_entry(side))
+        count_entry.bind("<Return>", lambda e: self.update_count_from_entry(index))
+        self.count_entries.append(count_entry)
+
+        # Rolling rates from the event history, refreshed every second
+        rate_label = ttk.Label(frame, text="", font=("Arial", 8))
+        rate_label.pack(fill="x", padx=15)
+        self.rate_labels.append(rate_label)
 
         # Button Frame
         button_frame = ttk.Frame(frame, padding="10")
         button_frame.pack(fill="x")
 
-        # +1 Button and Hotkey Setter
-        btn_frame = ttk.Frame(button_frame)
-        btn_frame.pack(side="top", fill="x", pady=2)
-        ttk.Button(btn_frame, text="+1", command=lambda: self.increment(side)).pack(side="left")
-        set_hotkey_btn = ttk.Button(btn_frame, text="Set Hotkey", command=lambda: self.start_recording_hotkey(f"{side}_increment"))
-        set_hotkey_btn.pack(side="left", padx=5)
-        hotkey_label = ttk.Label(btn_frame, text=self.format_hotkey(f"{side}_increment"), font=("Arial", 8))
-        hotkey_label.pack(side="left", padx=5)
-        self.hotkey_labels[f"{side}_increment"] = hotkey_label
-
-        # -1 Button and Hotkey Setter
-        btn_frame = ttk.Frame(button_frame)
-        btn_frame.pack(side="top", fill="x", pady=2)
-        ttk.Button(btn_frame, text="-1", command=lambda: self.decrement(side)).pack(side="left")
-        set_hotkey_btn = ttk.Button(btn_frame, text="Set Hotkey", command=lambda: self.start_recording_hotkey(f"{side}_decrement"))
-        set_hotkey_btn.pack(side="left", padx=5)
-        hotkey_label = ttk.Label(btn_frame, text=self.format_hotkey(f"{side}_decrement"), font=("Arial", 8))
-        hotkey_label.pack(side="left", padx=5)
-        self.hotkey_labels[f"{side}_decrement"] = hotkey_label
-
-        # Reset Button and Hotkey Setter
-        btn_frame = ttk.Frame(button_frame)
-        btn_frame.pack(side="top", fill="x", pady=2)
-        ttk.Button(btn_frame, text="0", command=lambda: self.reset(side)).pack(side="left")
-        set_hotkey_btn = ttk.Button(btn_frame, text="Set Hotkey", command=lambda: self.start_recording_hotkey(f"{side}_reset"))
-        set_hotkey_btn.pack(side="left", padx=5)
-        hotkey_label = ttk.Label(btn_frame, text=self.format_hotkey(f"{side}_reset"), font=("Arial", 8))
-        hotkey_label.pack(side="left", padx=5)
-        self.hotkey_labels[f"{side}_reset"] = hotkey_label
+        # +1, -1 and Reset Buttons, each with a Hotkey Setter
+        for text, op, command in (("+1", "increment", lambda: self.adjust_count(index, 1)),
+                                  ("-1", "decrement", lambda: self.adjust_count(index, -1)),
+                                  ("0", "reset", lambda: self.engine.reset(index))):
+            action = hotkey_action(index, op)
+            self.hotkeys.setdefault(action, {"ctrl": False, "shift": False, "alt": False, "key": None})
+            btn_frame = ttk.Frame(button_frame)
+            btn_frame.pack(side="top", fill="x", pady=2)
+            ttk.Button(btn_frame, text=text, command=command).pack(side="left")
+            set_hotkey_btn = ttk.Button(btn_frame, text="Set Hotkey",
+                                        command=lambda action=action: self.start_recording_hotkey(action))
+            set_hotkey_btn.pack(side="left", padx=5)
+            hotkey_label = ttk.Label(btn_frame, text=self.format_hotkey(action), font=("Arial", 8))
+            hotkey_label.pack(side="left", padx=5)
+            self.hotkey_labels[action] = hotkey_label
 
         # Settings Frame
         settings_frame = ttk.LabelFrame(frame, text="Display Settings", padding="10")
         settings_frame.pack(fill="x", pady=5)
 
         # Background Options (only for Counter 1)
-        if side == "left":
+        if index == 0:
             # Background Color
-            ttk.Button(settings_frame, text="Background Color", 
+            ttk.Button(settings_frame, text="Background Color",
                       command=lambda: self.choose_bg_color()).pack(fill="x", pady=2)
 
             # Background Image
-            ttk.Button(settings_frame, text="Background Image", 
+            ttk.Button(settings_frame, text="Background Image",
                       command=lambda: self.choose_bg_image()).pack(fill="x", pady=2)
 
             # Remove Background Image
-            remove_bg_button = ttk.Button(settings_frame, text="Remove Background", 
+            remove_bg_button = ttk.Button(settings_frame, text="Remove Background",
                                          command=lambda: self.remove_bg_image())
             remove_bg_button.pack(fill="x", pady=2)
-            self.left_remove_bg_button = remove_bg_button
+            self.remove_bg_button = remove_bg_button
             self.update_remove_bg_button_state()
 
         # Font Color
-        ttk.Button(settings_frame, text="Font Color", 
-                  command=lambda: self.choose_font_color(side)).pack(fill="x", pady=2)
+        ttk.Button(settings_frame, text="Font Color",
+                  command=lambda: self.choose_font_color(index)).pack(fill="x", pady=2)
 
         # Font Selection
         font_frame = ttk.Frame(settings_frame)
         font_frame.pack(fill="x", pady=2)
         ttk.Label(font_frame, text="Font:").pack(side="left")
-        font_combo = ttk.Combobox(font_frame, textvariable=font_family)
-        fonts = sorted(list(font.families()))
-        font_combo['values'] = fonts
+        font_combo = ttk.Combobox(font_frame, textvariable=variables["font_family"])
+        font_combo.configure(postcommand=lambda: self.fill_font_list(font_combo))
         font_combo.pack(side="left", fill="x", expand=True)
-        font_combo.bind("<<ComboboxSelected>>", lambda e: self.update_display())
+        font_combo.bind("<<ComboboxSelected>>", lambda e: self.engine.set_counter(
+            index, font_family=variables["font_family"].get()))
 
         # Font Size
         size_frame = ttk.Frame(settings_frame)
         size_frame.pack(fill="x", pady=2)
         ttk.Label(size_frame, text="Size:").pack(side="left")
-        ttk.Spinbox(size_frame, from_=8, to=72, textvariable=font_size,
-                   command=lambda: self.update_display()).pack(side="left")
-
-    def start_hotkey_listener(self):
-        self.current_keys = set()
+        ttk.Spinbox(size_frame, from_=8, to=72, textvariable=variables["font_size"],
+                   command=lambda: self.engine.set_counter(
+                       index, font_size=variables["font_size"].get())).pack(side="left")
+
+        # Automatic Reset
+        rollover_frame = ttk.Frame(settings_frame)
+        rollover_frame.pack(fill="x", pady=2)
+        ttk.Label(rollover_frame, text="Auto Reset:").pack(side="left")
+        rollover_combo = ttk.Combobox(rollover_frame, textvariable=variables["rollover"], values=ROLLOVER_MODES,
+                                      state="readonly", width=10)
+        rollover_combo.pack(side="left")
+        rollover_combo.bind("<<ComboboxSelected>>", lambda e: self.engine.set_counter(
+            index, rollover=variables["rollover"].get()))
+
+    def fill_font_list(self, font_combo):
+        if self.font_families is None:
+            self.font_families = load_font_families(self.root, os.path.join(self.base_path, "font_cache.json"))
+        if not font_combo['values']:
+            font_combo['values'] = self.font_families
+
+    def teardown_counter(self):
+        # Remove the widgets and hotkeys of the last counter
+        index = len(self.counter_frames) - 1
+        self.counter_frames.pop().destroy()
+        self.counter_vars.pop()
+        self.count_entries.pop()
+        self.rate_labels.pop()
+        for op in HOTKEY_OPS:
+            action = hotkey_action(index, op)
+            self.hotkeys.pop(action, None)
+            self.hotkey_labels.pop(action, None)
+
+    def add_counter(self):
+        self.engine.add_counter(label_text=f"Counter {len(self.engine.counters) + 1}:")
+
+    def remove_counter(self):
+        if len(self.engine.counters) > 1:
+            # Only a counter removed by the user loses its history; a profile switch keeps it
+            self.history.forget((self.active_profile, len(self.engine.counters) - 1))
+            self.engine.remove_counter()
+
+    def on_engine_change(self, index, fields):
+        if index is None:
+            if "bg_image_path" in fields:
+                self.load_bg_image()
+            if "spacing" in fields and self.viewer_spacing.get() != self.engine.viewer["spacing"]:
+                self.viewer_spacing.set(self.engine.viewer["spacing"])
+            if "auto_fit" in fields and self.viewer_auto_fit.get() != self.engine.viewer["auto_fit"]:
+                self.viewer_auto_fit.set(self.engine.viewer["auto_fit"])
+        elif index >= len(self.engine.counters):
+            self.teardown_counter()
+            self.compile_hotkeys()
+        elif index >= len(self.counter_frames):
+            self.setup_counter(index)
+            self.compile_hotkeys()
+        else:
+            # Mirror the changed fields into the widgets (skipping values they already show)
+            counter = self.engine.counters[index]
+            for name in fields:
+                variable = self.counter_vars[index].get(name)
+                if variable is None:
+                    continue
+                try:
+                    current = variable.get()
+                except tk.TclError:
+                    current = None  # Entry holds text that isn't a valid value yet
+                if current != getattr(counter, name):
+                    variable.set(getattr(counter, name))
+        self.viewer_dirty = True
+
+    def journal_count_change(self, index, fields):
+        if self.snapshot_pending:
+            return  # Journal entries are by index and would replay into the previous profile
+        if index is not None and "count" in fields and index < len(self.engine.counters):
+            self.journal.record(index, self.engine.counters[index].count)
+
+    def start_overlay_server(self, host, port):
+        server = OverlayServer(host, port)
+        try:
+            server.start()
+        except OSError as e:
+            messagebox.showwarning("Warning", f"Could not start the overlay server: {e}")
+            return
+        self.overlay_server = server
+        # Changed fields are collected per frame and pushed to the browser sources in one message
+        self.overlay_viewer_fields = set()
+        self.overlay_counter_fields = {}
+        server.publish(self.engine.to_dict(), VIEWER_FIELDS,
+                       {index: COUNTER_FIELDS for index in range(len(self.engine.counters))})
+        self.engine.subscribe(self.collect_overlay_change)
+
+    def collect_overlay_change(self, index, fields):
+        if index is None:
+            self.overlay_viewer_fields.update(fields)
+        else:
+            self.overlay_counter_fields.setdefault(index, set()).update(fields)
 
-        def on_press(key):
-            try:
-                self.current_keys.add(key)
-                for action, hotkey in self.hotkeys.items():
-                    required_ctrl = hotkey.get("ctrl", False)
-                    required_shift = hotkey.get("shift", False)
-                    required_alt = hotkey.get("alt", False)
-                    required_key = hotkey["key"]
-
-                    ctrl_pressed = any(k in [keyboard.Key.ctrl_l, keyboard.Key.ctrl_r] for k in self.current_keys)
-                    shift_pressed = any(k in [keyboard.Key.shift_l, keyboard.Key.shift_r] for k in self.current_keys)
-                    alt_pressed = any(k in [keyboard.Key.alt_l, keyboard.Key.alt_r] for k in self.current_keys)
-                    key_pressed = required_key in self.current_keys
-
-                    if (ctrl_pressed == required_ctrl and
-                        shift_pressed == required_shift and
-                        alt_pressed == required_alt and
-                        key_pressed):
-                        side = "left" if "left" in action else "right"
-                        if "increment" in action:
-                            self.root.after(0, lambda: self.increment(side))
-                        elif "decrement" in action:
-                            self.root.after(0, lambda: self.decrement(side))
-                        elif "reset" in action:
-                            self.root.after(0, lambda: self.reset(side))
-            except AttributeError:
-                pass
-
-        def on_release(key):
-            try:
-                if key in self.current_keys:
-                    self.current_keys.remove(key)
-            except AttributeError:
-                pass
+    def publish_overlay_changes(self):
+        if self.overlay_viewer_fields or self.overlay_counter_fields:
+            self.overlay_server.publish(self.engine.to_dict(), self.overlay_viewer_fields, self.overlay_counter_fields)
+            self.overlay_viewer_fields = set()
+            self.overlay_counter_fields = {}
 
-        listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-        listener_thread = threading.Thread(target=listener.start, daemon=True)
-        listener_thread.start()
+    def start_control_server(self, host, port, socket_path):
+        server = ControlServer(self.command_queue, host, port, socket_path)
+        try:
+            server.start()
+        except OSError as e:
+            messagebox.showwarning("Warning", f"Could not start the control server: {e}")
+            return
+        self.control_server = server
+        # The server answers queries from the counts published here after each changing frame
+        self.control_counts_dirty = True
+        self.publish_control_counts()
+        server.profiles = tuple(self.profiles)
+        self.engine.subscribe(self.collect_control_change)
+
+    def collect_control_change(self, index, fields):
+        if index is not None and (index >= len(self.engine.counters) or "count" in fields):
+            self.control_counts_dirty = True
+
+    def publish_control_counts(self):
+        if self.control_counts_dirty:
+            self.control_server.counts = tuple(self.engine.counts())
+            self.control_counts_dirty = False
+
+    def start_shared_state(self):
+        path = self.shared_state_settings["path"] or os.path.join(self.base_path, "stream_counter_state.bin")
+        try:
+            self.shared_state = SharedStateWriter(path)
+        except (OSError, ValueError) as e:
+            messagebox.showwarning("Warning", f"Could not open the shared state file: {e}")
+            return
+        self.shared_state.publish(self.engine.counts())
+        self.shared_state_dirty = False
+        self.engine.subscribe(self.collect_shared_state_change)
+
+    def collect_shared_state_change(self, index, fields):
+        if index is not None and (index >= len(self.engine.counters) or "count" in fields):
+            self.shared_state_dirty = True
+
+    def start_image_output(self):
+        # PIL (and the compositor with it) is only imported when image output is enabled
+        from compositor import OverlayCompositor, FrameWriter, FontIndex
+        settings = self.image_output_settings
+        font_index = FontIndex(os.path.join(self.base_path, "font_files.json"))
+        self.image_output = OverlayCompositor((settings["width"], settings["height"]), settings["transparent"],
+                                              font_index)
+        self.image_writer = FrameWriter(settings["path"] or os.path.join(self.base_path, "overlay.png"))
+        self.image_output_dirty = True
+        self.engine.subscribe(self.collect_image_change)
+
+    def collect_image_change(self, index, fields):
+        self.image_output_dirty = True
+
+    def render_image_output(self):
+        self.image_output_dirty = False
+        viewer = self.engine.viewer
+        frame = self.image_output.render(viewer["bg_color"], self.bg_image, viewer["spacing"],
+                                         self.viewer_items(self.image_output.size))
+        self.image_writer.submit(frame)
+
+    def start_text_output(self):
+        directory = self.text_output_settings["directory"] or os.path.join(self.base_path, "text_output")
+        self.text_output = TextFileOutput(directory, self.text_output_settings["debounce_ms"])
+        for index in range(len(self.engine.counters)):
+            self.collect_text_change(index, ("label_text", "count"))
+        self.text_output.flush(force=True)
+        self.engine.subscribe(self.collect_text_change)
+
+    def collect_text_change(self, index, fields):
+        if index is not None and index < len(self.engine.counters) and ("count" in fields or "label_text" in fields):
+            counter = self.engine.counters[index]
+            self.text_output.update(index, f"{counter.label_text} {counter.count}")
+
+    def adjust_count(self, index, amount):
+        previous = self.engine.counters[index].count
+        self.engine.set_count(index, previous + amount)
+        self.record_history({index: self.engine.counters[index].count - previous})
+
+    def record_history(self, deltas):
+        # Only increments and decrements are history. Resets, typed values, rollovers and profile
+        # switches set counts directly and never come through here, so they stay out of the rates.
+        now = time.time()
+        for index, delta in deltas.items():
+            if delta:
+                self.history.record((self.active_profile, index), delta, now)
+                self.history_dirty = True
+
+    def update_rates(self):
+        self.apply_rollover()
+        now = time.time()
+        # Saved periodically (which also trims it) so a crash loses at most a minute of history
+        if self.history_dirty and now - self.history_saved >= HISTORY_SAVE_INTERVAL:
+            self.history.save(self.history_file)
+            self.history_dirty = False
+            self.history_saved = now
+        for index, rate_label in enumerate(self.rate_labels):
+            counter = (self.active_profile, index)
+            text = (f"Last 10 min: {self.history.total_since(counter, now - RECENT_WINDOW)}  |  "
+                    f"Per hour: {self.history.per_hour(counter, 3600, now):.0f}")
+            if rate_label.cget("text") != text:
+                rate_label.configure(text=text)
+        self.root.after(RATES_INTERVAL_MS, self.update_rates)
+
+    def apply_rollover(self, startup=False):
+        # "day" counters reset when the (optionally shifted) calendar day changes, "session" counters
+        # when the app starts after being inactive for longer than the session gap. Inactive profiles
+        # catch up when they are switched in (see apply_profile_rollover).
+        now = time.time()
+        day = time.strftime("%Y-%m-%d", time.localtime(now - self.rollover_settings["day_start_hour"] * 3600))
+        new_day = self.rollover_day is not None and day != self.rollover_day
+        new_session = (startup and self.last_active and
+                       now - self.last_active > self.rollover_settings["session_gap_hours"] * 3600)
+        for index, counter in enumerate(self.engine.counters):
+            if (counter.rollover == "day" and new_day) or (counter.rollover == "session" and new_session):
+                self.engine.reset(index)
+        self.rollover_day = day
+        if new_session:
+            self.session_started = now
+
+    def apply_profile_rollover(self, profile):
+        # Resets a saved profile's counters for the days and sessions that began while it was inactive
+        new_day = profile.get("rollover_day") is not None and profile["rollover_day"] != self.rollover_day
+        new_session = profile.get("last_active", 0) < self.session_started
+        for counter in profile.get("counters", []):
+            rollover = counter.get("rollover")
+            if (rollover == "day" and new_day) or (rollover == "session" and new_session):
+                counter["count"] = 0
+
+    def compile_hotkeys(self):
+        # Commands resolved once; the table is recompiled only when a binding or counter changes
+        hotkey_commands = counter_commands(len(self.engine.counters))
+        hotkey_commands[PROFILE_NEXT_ACTION] = ("profile", None, 0)
+        self.hotkey_commands = hotkey_commands
+        self.hotkey_table.compile(self.hotkeys)
+
+    def dispatch_hotkey(self, action):
+        # Runs on the listener thread; only queues the command
+        command = self.hotkey_commands.get(action)
+        if command:
+            self.metrics.key_received()
+            self.command_queue.push(*command)
+
+    def on_hotkey_press(self, key):
+        self.key_listener.on_press(key)
+
+    def on_hotkey_release(self, key):
+        self.key_listener.on_release(key)
+
+    def start_hotkey_listener(self, record_keys=None):
+        self.compile_hotkeys()
+        # Optionally every key event goes to a trace file for hotkey_replay.py
+        self.key_trace = None
+        if record_keys:
+            self.key_trace = TraceWriter(record_keys, self.serialize_hotkeys(self.hotkeys),
+                                         self.hotkey_repeat_policy, self.engine.counts())
+        self.key_listener = KeyListener(self.hotkey_table, self.dispatch_hotkey, self.key_trace)
+        self.key_listener.start()
 
     def start_recording_hotkey(self, action):
         if self.recording_hotkey:
             messagebox.showwarning("Warning", "Already recording a hotkey. Please finish or press Esc to cancel.")
             return
 
+        # The listener switches to record mode on its next event; the result comes back through
+        # apply_recorded_hotkeys on the Tk thread
         self.recording_hotkey = action
-        self.current_keys = set()
         self.hotkey_labels[action].configure(text="Press keys (Esc to cancel)...")
-
-        def on_press(key):
-            try:
-                if key == keyboard.Key.esc:
-                    self.hotkey_labels[action].configure(text=self.format_hotkey(action))
-                    self.recording_hotkey = None
-                    return False
-                self.current_keys.add(key)
-            except AttributeError:
-                pass
-
-        def on_release(key):
-            try:
-                if key in self.current_keys:
-                    self.current_keys.remove(key)
-                if not self.current_keys and key != keyboard.Key.esc:
-                    ctrl_pressed = any(k in [keyboard.Key.ctrl_l, keyboard.Key.ctrl_r] for k in self.current_keys)
-                    shift_pressed = any(k in [keyboard.Key.shift_l, keyboard.Key.shift_r] for k in self.current_keys)
-                    alt_pressed = any(k in [keyboard.Key.alt_l, keyboard.Key.alt_r] for k in self.current_keys)
-                    main_key = key
-
-                    if not hasattr(main_key, 'char') and main_key not in [keyboard.Key.ctrl_l, keyboard.Key.ctrl_r,
-                                                                         keyboard.Key.shift_l, keyboard.Key.shift_r,
-                                                                         keyboard.Key.alt_l, keyboard.Key.alt_r]:
-                        new_hotkey = {
-                            "ctrl": ctrl_pressed,
-                            "shift": shift_pressed,
-                            "alt": alt_pressed,
-                            "key": main_key
-                        }
-                        for other_action, other_hotkey in self.hotkeys.items():
-                            if other_action != action and other_hotkey == new_hotkey:
-                                messagebox.showwarning("Warning", "This hotkey is already in use by another action.")
-                                self.hotkey_labels[action].configure(text=self.format_hotkey(action))
-                                self.recording_hotkey = None
-                                return False
-
-                        self.hotkeys[action] = new_hotkey
-                        self.hotkey_labels[action].configure(text=self.format_hotkey(action))
-                        self.recording_hotkey = None
-                        return False
-            except AttributeError:
-                pass
-
-        listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-        listener.start()
+        self.key_listener.record(action)
+
+    def apply_recorded_hotkeys(self):
+        for outcome, action, new_hotkey in self.key_listener.poll():
+            self.recording_hotkey = None
+            if action not in self.hotkey_labels:
+                continue  # The counter was removed while recording
+            if outcome == "recorded":
+                # Compared as the table sees them, so a binding saved without "alt" still matches
+                binding = (modifier_mask(new_hotkey), normalize_key(new_hotkey["key"]))
+                in_use = any(other_action != action and other_hotkey.get("key") is not None and
+                             (modifier_mask(other_hotkey), normalize_key(other_hotkey["key"])) == binding
+                             for other_action, other_hotkey in self.hotkeys.items())
+                if in_use:
+                    messagebox.showwarning("Warning", "This hotkey is already in use by another action.")
+                else:
+                    self.hotkeys[action] = new_hotkey
+                    self.hotkey_table.compile(self.hotkeys)
+            self.hotkey_labels[action].configure(text=self.format_hotkey(action))
 
     def format_hotkey(self, action):
         hotkey = self.hotkeys[action]
+        if hotkey["key"] is None:
+            return "Not set"
         modifiers = []
         if hotkey.get("ctrl", False):
             modifiers.append("Ctrl")
@@ -360,206 +705,577 @@ class StreamCounter:
         return key_name
 
     def update_display(self):
-        # Update text for both counters
-        self.left_display_label.configure(
-            text=f"{self.left_label_text.get()} {self.left_count.get()}",
-            font=(self.left_font_family.get(), self.left_font_size.get()),
-            fg=self.left_font_color.get(),
-            bg=self.left_bg_color.get()
-        )
+        # Hand the current state to the renderer, which only reconfigures what changed
+        self.viewer_dirty = False
+        self.viewer_renderer.render(self.engine.viewer["bg_color"], self.engine.viewer["spacing"],
+                                    self.viewer_items(self.display_size))
+
+    def viewer_items(self, display_size):
+        # (text, font, fg, visible) per counter for a viewer of the given size
+        viewer = self.engine.viewer
+        texts = [f"{counter.label_text} {counter.count}" for counter in self.engine.counters]
+        sizes = [counter.font_size for counter in self.engine.counters]
+        if viewer["auto_fit"]:
+            # One shared size for all visible labels; a cache lookup unless a label changed shape
+            fit = self.font_metrics.fit(
+                [(counter.font_family, text) for counter, text in zip(self.engine.counters, texts)
+                 if counter.include_in_viewer], *display_size, viewer["spacing"])
+            sizes = [fit] * len(sizes)
+        return [(text, (counter.font_family, size), counter.font_color, counter.include_in_viewer)
+                for counter, text, size in zip(self.engine.counters, texts, sizes)]
+
+    def toggle_viewer_window(self):
+        if self.viewer_window:
+            self.viewer_window.close()
+        else:
+            self.viewer_window = ViewerWindow(self, self.viewer_window_settings, self.on_viewer_window_closed)
+            self.viewer_window_settings["enabled"] = True
+
+    def on_viewer_window_closed(self):
+        self.viewer_window = None
+        self.viewer_window_settings["enabled"] = False
+
+    def on_display_configure(self, event):
+        self.display_size = (event.width, event.height)
+        self.display_configured = True
+        self.update_background()
+        self.schedule_prewarm()
+        if self.engine.viewer["auto_fit"]:
+            self.viewer_dirty = True
+
+    def update_background(self):
+        # Update background image if exists (resized images come from the cache). Before the canvas
+        # is mapped its size is a placeholder (winfo reports 1x1), so nothing is decoded until the
+        # first <Configure> brings the real one.
+        if self.bg_image and self.display_configured:
+            if self.bg_image.is_animated():
+                if self.bg_animation is None and self.bg_animation_loading is None:
+                    # The first frame stands in while the animation is decoded
+                    self.show_bg_photo(self.bg_cache.get(self.bg_image, self.display_size))
+                    self.load_bg_animation()
+                else:
+                    # Every frame is decoded again for a new size, so while the canvas is being
+                    # resized the running (or loading) animation carries on and is rebuilt once
+                    # it settles
+                    if self.bg_animation_resize_job is not None:
+                        self.root.after_cancel(self.bg_animation_resize_job)
+                    self.bg_animation_resize_job = self.root.after(ANIMATION_RESIZE_DELAY_MS,
+                                                                   self.resize_bg_animation)
+            else:
+                self.stop_bg_animation()
+                self.show_bg_photo(self.bg_cache.get(self.bg_image, self.display_size))
 
-        self.right_display_label.configure(
-            text=f"{self.right_label_text.get()} {self.right_count.get()}",
-            font=(self.right_font_family.get(), self.right_font_size.get()),
-            fg=self.right_font_color.get(),
-            bg=self.left_bg_color.get()
-        )
+        # Center the label frame in the canvas
+        self.display_canvas.coords(self.label_frame_id, self.display_size[0] / 2, self.display_size[1] / 2)
 
-        # Repack labels with updated spacing
-        self.left_display_label.pack_forget()
-        self.right_display_label.pack_forget()
-        self.left_display_label.pack(pady=self.viewer_spacing.get())
-        if self.right_include_in_viewer.get():
-            self.right_display_label.pack(pady=self.viewer_spacing.get())
-
-        # Update canvas background
-        self.display_canvas.configure(bg=self.left_bg_color.get())
-        self.label_frame.configure(bg=self.left_bg_color.get())
-
-        # Update background image if exists
-        if self.left_bg_image:
-            canvas_width = self.display_canvas.winfo_width()
-            canvas_height = self.display_canvas.winfo_height()
-            if canvas_width <= 0 or canvas_height <= 0:
-                canvas_width, canvas_height = 200, 100
-            image = self.left_bg_image.resize((canvas_width, canvas_height), Image.Resampling.LANCZOS)
-            self.left_bg_photo = ImageTk.PhotoImage(image)
-            if hasattr(self, 'bg_image_id'):
-                self.display_canvas.delete(self.bg_image_id)
-            self.bg_image_id = self.display_canvas.create_image(0, 0, image=self.left_bg_photo, anchor="nw")
+    def show_bg_photo(self, photo):
+        self.bg_photo = photo
+        if hasattr(self, 'bg_image_id'):
+            self.display_canvas.itemconfigure(self.bg_image_id, image=self.bg_photo)
+        else:
+            self.bg_image_id = self.display_canvas.create_image(0, 0, image=self.bg_photo, anchor="nw")
             # Ensure the label frame is on top of the background image
             self.display_canvas.tag_raise(self.label_frame_id)
 
-        # Center the label frame in the canvas
-        canvas_width = self.display_canvas.winfo_width()
-        canvas_height = self.display_canvas.winfo_height()
-        self.display_canvas.coords(self.label_frame_id, canvas_width / 2, canvas_height / 2)
-
-    def increment(self, side):
-        count = self.left_count if side == "left" else self.right_count
-        count.set(count.get() + 1)
-        self.update_display()
-
-    def decrement(self, side):
-        count = self.left_count if side == "left" else self.right_count
-        count.set(max(0, count.get() - 1))
-        self.update_display()
+    def start_bg_animation(self, frames):
+        # Frames are picked by wall-clock position in the loop, so a late tick skips ahead
+        # instead of slowing the animation down
+        self.stop_bg_animation()
+        self.bg_animation = frames
+        self.bg_animation_length = sum(duration for _, duration in frames)
+        self.bg_animation_started = time.monotonic()
+        self.bg_animation_frame = None
+        self.play_bg_animation()
+
+    def play_bg_animation(self):
+        position = (time.monotonic() - self.bg_animation_started) * 1000 % self.bg_animation_length
+        for index, (photo, duration) in enumerate(self.bg_animation):
+            if position < duration:
+                break
+            position -= duration
+        if index != self.bg_animation_frame:
+            self.bg_animation_frame = index
+            self.show_bg_photo(photo)
+        self.bg_animation_job = self.root.after(max(1, int(duration - position)), self.play_bg_animation)
+
+    def resize_bg_animation(self):
+        self.bg_animation_resize_job = None
+        if self.bg_image and self.bg_image.is_animated():
+            self.load_bg_animation()
+
+    def load_bg_animation(self):
+        # Starts the cached frames for the current size, or decodes them on a worker thread; the
+        # running animation (if any) keeps playing until apply_decoded_animation has them ready
+        frames = self.bg_cache.get_frames(self.bg_image, self.display_size)
+        if frames is not None:
+            if frames is not self.bg_animation:
+                self.start_bg_animation(frames)
+            return
+        key = (self.bg_image.key, self.display_size)
+        if self.bg_animation_loading == key:
+            return
+        self.bg_animation_loading = key
+        self.bg_animation_wrapping = None
+        threading.Thread(target=self.decode_bg_animation, args=(self.bg_image.path, key), daemon=True).start()
 
-    def reset(self, side):
-        count = self.left_count if side == "left" else self.right_count
-        count.set(0)
-        self.update_display()
+    def decode_bg_animation(self, path, key):
+        # Worker thread, with a source object of its own
+        try:
+            frames = open_image(path, self.background_settings["source_scale"]).frames(key[1])
+        except (OSError, ValueError):
+            frames = []
+        self.decoded_animations.append((key, frames))
+
+    def apply_decoded_animation(self):
+        # Frame loop: wraps one slice of the decoded frames per frame, dropping any for a source or
+        # size that is no longer wanted
+        for _ in range(len(self.decoded_animations)):
+            key, frames = self.decoded_animations.popleft()
+            if key == self.bg_animation_loading:
+                self.bg_animation_wrapping = (key, frames)
+        if self.bg_animation_wrapping is None:
+            return
+        (source_key, size), frames = self.bg_animation_wrapping
+        if not frames:
+            self.bg_animation_wrapping = None  # Unreadable; the first frame stays up
+            return
+        if self.bg_cache.add_frames(source_key, size, frames, ANIMATION_WRAP_BUDGET_MS / 1000):
+            self.bg_animation_wrapping = None
+            self.bg_animation_loading = None
+            self.start_bg_animation(frames)
+
+    def stop_bg_animation(self):
+        if self.bg_animation_job is not None:
+            self.root.after_cancel(self.bg_animation_job)
+            self.bg_animation_job = None
+        if self.bg_animation_resize_job is not None:
+            self.root.after_cancel(self.bg_animation_resize_job)
+            self.bg_animation_resize_job = None
+        self.bg_animation = None
+        self.bg_animation_loading = None
+        self.bg_animation_wrapping = None
+
+    def load_bg_image(self):
+        path = self.engine.viewer["bg_image_path"]
+        self.bg_image = (open_image(path, self.background_settings["source_scale"])
+                         if path and os.path.exists(path) else None)
+        self.stop_bg_animation()  # A new animation starts at once rather than as a resize
+        if not self.bg_image:
+            self.bg_photo = None
+            if hasattr(self, 'bg_image_id'):
+                self.display_canvas.delete(self.bg_image_id)
+                delattr(self, 'bg_image_id')
+        self.update_background()
+        self.update_remove_bg_button_state()
 
-    def update_count_from_entry(self, side):
-        count = self.left_count if side == "left" else self.right_count
-        count_entry = self.left_counter_frame.winfo_children()[1].winfo_children()[1] if side == "left" else self.right_counter_frame.winfo_children()[1].winfo_children()[1]
+    def process_commands(self):
+        # The next frame is scheduled whatever happens in this one, so one failing subscriber or
+        # output cannot stop hotkeys and the other outputs for the rest of the session
         try:
-            value = int(count_entry.get())
-            count.set(max(0, value))
+            self.run_frame()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self.root.after(FRAME_INTERVAL_MS, self.process_commands)
+
+    def run_frame(self):
+        # Apply everything queued since the last frame as one update per counter
+        started = self.metrics.frame_started()
+        if self.key_listener.results:
+            self.apply_recorded_hotkeys()
+        if self.prewarmed:
+            self.apply_prewarmed()
+        if self.decoded_animations or self.bg_animation_wrapping:
+            self.apply_decoded_animation()
+        commands = self.command_queue.drain()
+        if commands:
+            self.apply_commands(commands)
+        if self.viewer_dirty:
             self.update_display()
+            self.metrics.render_finished()
+        if self.snapshot_pending and not self.snapshot_scheduled:
+            # Registered after the switch has been rendered, so it runs once Tk has painted it
+            self.snapshot_scheduled = True
+            self.root.after_idle(self.save_snapshot)
+        if self.overlay_server:
+            self.publish_overlay_changes()
+        if self.control_server:
+            self.publish_control_counts()
+        if self.image_output and (self.image_output_dirty or self.image_output.fonts_changed()):
+            self.render_image_output()
+        if self.shared_state and self.shared_state_dirty:
+            self.shared_state.publish(self.engine.counts())
+            self.shared_state_dirty = False
+        if self.text_output:
+            self.text_output.flush()
+        self.journal.sync()
+        if self.journal.needs_compaction():
+            self.save_settings()
+        if commands:
+            self.metrics.frame_finished(started)
+
+    def apply_commands(self, commands):
+        # Profile switches split the batch so counter commands land in the profile they were sent to
+        start = 0
+        for position, command in enumerate(commands):
+            if command[0] == "profile":
+                self.apply_counter_commands(commands[start:position])
+                self.switch_profile(command[1] or self.next_profile())
+                start = position + 1
+        self.apply_counter_commands(commands[start:] if start else commands)
+
+    def apply_counter_commands(self, commands):
+        if not commands:
+            return
+        counters = self.engine.counters
+        added = {}
+        values = self.command_queue.fold(
+            [command for command in commands if command[1] < len(counters)],
+            lambda index: counters[index].count, added)
+        for index, value in values.items():
+            self.engine.set_count(index, value)
+        self.record_history(added)
+
+    def profile_snapshot(self):
+        profile = self.engine.to_dict()
+        profile["hotkeys"] = self.serialize_hotkeys(
+            {action: hotkey for action, hotkey in self.hotkeys.items() if is_counter_action(action)})
+        profile["rollover_day"] = self.rollover_day
+        profile["last_active"] = time.time()
+        return profile
+
+    def next_profile(self):
+        names = list(self.profiles)
+        return names[(names.index(self.active_profile) + 1) % len(names)]
+
+    def switch_profile(self, name, keep_current=True):
+        # Values are swapped into the existing widgets; only a difference in the number of
+        # counters creates or destroys any
+        if name == self.active_profile or name not in self.profiles:
+            return
+        if keep_current:
+            self.profiles[self.active_profile] = self.profile_snapshot()
+        else:
+            del self.profiles[self.active_profile]
+            self.history.forget_profile(self.active_profile)
+        profile = self.profiles[name]
+        self.apply_profile_rollover(profile)
+        self.profiles[name] = None
+        self.active_profile = name
+        self.schedule_snapshot()  # Before apply_dict, so none of the new counts reach the journal
+
+        hotkeys = {action: hotkey for action, hotkey in self.hotkeys.items() if not is_counter_action(action)}
+        hotkeys.update(self.parse_hotkeys(profile.get("hotkeys", {})))
+        self.hotkeys = hotkeys
+        self.engine.apply_dict(profile)
+        for action, label in self.hotkey_labels.items():
+            self.hotkeys.setdefault(action, {"ctrl": False, "shift": False, "alt": False, "key": None})
+            label.configure(text=self.format_hotkey(action))
+        self.compile_hotkeys()
+
+        self.refresh_profile_list()
+        self.schedule_prewarm()
+
+    def schedule_snapshot(self):
+        # The settings snapshot naming the new profile is written by the first idle pass after the
+        # next frame has rendered the switch (see run_frame), instead of inside the frame. Until then
+        # the settings file still names the previous profile, so the journal is paused and a crash
+        # just reopens that profile.
+        self.snapshot_pending = True
+
+    def save_snapshot(self):
+        self.snapshot_scheduled = False
+        if self.snapshot_pending:
+            self.save_settings()
+
+    def new_profile(self):
+        name = simpledialog.askstring("New Profile", "Profile name:", parent=self.root)
+        if not name or not name.strip():
+            return
+        name = name.strip()
+        if name in self.profiles:
+            messagebox.showwarning("Warning", "A profile with this name already exists.")
+            return
+        # Starts as a copy of the current profile with the counts at zero
+        profile = self.profile_snapshot()
+        for counter in profile["counters"]:
+            counter["count"] = 0
+        self.profiles[name] = profile
+        self.switch_profile(name)
+
+    def delete_profile(self):
+        if len(self.profiles) < 2:
+            messagebox.showwarning("Warning", "The last profile cannot be deleted.")
+            return
+        if not messagebox.askyesno("Delete Profile", f"Delete the profile \"{self.active_profile}\"?"):
+            return
+        names = list(self.profiles)
+        index = names.index(self.active_profile)
+        self.switch_profile(names[index + 1] if index + 1 < len(names) else names[index - 1], keep_current=False)
+
+    def refresh_profile_list(self):
+        self.profile_combo.configure(values=list(self.profiles))
+        self.profile_var.set(self.active_profile)
+        if self.control_server:
+            self.control_server.profiles = tuple(self.profiles)
+
+    def schedule_prewarm(self):
+        if self.prewarm_job is not None:
+            self.root.after_cancel(self.prewarm_job)
+        self.prewarm_job = self.root.after(PREWARM_DELAY_MS, self.prewarm_profiles)
+
+    def prewarm_profiles(self):
+        # Resolve the fonts of the inactive profiles now and scale their backgrounds to the current
+        # canvas size on a worker thread, so a switch finds everything it renders already cached
+        self.prewarm_job = None
+        size = self.display_size
+        paths = []
+        for profile in self.profiles.values():
+            if profile is None:
+                continue
+            for counter in profile.get("counters", []):
+                font = (counter.get("font_family", "Arial"), counter.get("font_size", 12))
+                if font not in self.warm_fonts:
+                    self.warm_fonts[font] = tkfont.Font(self.root, family=font[0], size=font[1])
+                    self.warm_fonts[font].metrics("linespace")
+            path = profile.get("viewer", {}).get("bg_image_path", "")
+            if path and os.path.exists(path):
+                paths.append(path)
+        if paths and self.display_configured:
+            threading.Thread(target=self.prewarm_backgrounds, args=(paths, size), daemon=True).start()
+
+    def prewarm_backgrounds(self, paths, size):
+        # Worker thread; the scaled images are wrapped in PhotoImages by apply_prewarmed on the Tk thread
+        for path in paths:
+            try:
+                source = open_image(path, self.background_settings["source_scale"])
+                if not source.is_animated():
+                    self.prewarmed.append((source, size, self.bg_cache.prepare(source, size)))
+            except OSError:
+                continue
+
+    def apply_prewarmed(self):
+        for _ in range(len(self.prewarmed)):
+            source, size, image = self.prewarmed.popleft()
+            if not self.bg_cache.contains(source, size):
+                self.bg_cache.insert(source, size, image)
+
+    def update_count_from_entry(self, index):
+        count_entry = self.count_entries[index]
+        try:
+            value = int(count_entry.get())
+            self.engine.set_count(index, value)
+            self.counter_vars[index]["count"].set(self.engine.counters[index].count)
         except ValueError:
             count_entry.delete(0, tk.END)
-            count_entry.insert(0, count.get())
+            count_entry.insert(0, self.engine.counters[index].count)
 
     def choose_bg_color(self):
         color = colorchooser.askcolor(title="Choose Background Color")[1]
         if color:
-            self.left_bg_color.set(color)
-            self.left_bg_image = None
-            self.left_bg_photo = None
-            self.left_bg_image_path.set("")
-            if hasattr(self, 'bg_image_id'):
-                self.display_canvas.delete(self.bg_image_id)
-                delattr(self, 'bg_image_id')
-            self.update_display()
-            self.update_remove_bg_button_state()
+            self.engine.set_viewer(bg_color=color, bg_image_path="")
 
     def choose_bg_image(self):
         file_path = filedialog.askopenfilename(
-            filetypes=[("Image files", "*.png *.jpg *.jpeg *.gif *.bmp")]
+            filetypes=[("Image files", "*.png *.apng *.jpg *.jpeg *.gif *.webp *.bmp")]
         )
         if file_path:
-            self.left_bg_image = Image.open(file_path)
-            self.left_bg_image_path.set(file_path)
-            self.update_display()
-            self.update_remove_bg_button_state()
+            self.engine.set_viewer(bg_image_path=file_path)
 
     def remove_bg_image(self):
-        self.left_bg_image = None
-        self.left_bg_photo = None
-        self.left_bg_image_path.set("")
-        if hasattr(self, 'bg_image_id'):
-            self.display_canvas.delete(self.bg_image_id)
-            delattr(self, 'bg_image_id')
-        self.update_display()
-        self.update_remove_bg_button_state()
+        self.engine.set_viewer(bg_image_path="")
 
     def update_remove_bg_button_state(self):
-        if self.left_bg_image_path.get():
-            self.left_remove_bg_button.configure(state="normal")
+        if self.engine.viewer["bg_image_path"]:
+            self.remove_bg_button.configure(state="normal")
         else:
-            self.left_remove_bg_button.configure(state="disabled")
+            self.remove_bg_button.configure(state="disabled")
 
-    def choose_font_color(self, side):
+    def choose_font_color(self, index):
         color = colorchooser.askcolor(title="Choose Font Color")[1]
         if color:
-            if side == "left":
-                self.left_font_color.set(color)
-            else:
-                self.right_font_color.set(color)
-            self.update_display()
+            self.engine.set_counter(index, font_color=color)
 
     def copy_settings(self):
-        self.right_font_color.set(self.left_font_color.get())
-        self.right_font_size.set(self.left_font_size.get())
-        self.right_font_family.set(self.left_font_family.get())
-        self.update_display()
+        # Copy Counter 1's font settings to every other counter
+        source = self.engine.counters[0]
+        for index in range(1, len(self.engine.counters)):
+            self.engine.set_counter(index, font_color=source.font_color, font_size=source.font_size,
+                                    font_family=source.font_family)
 
     def save_settings(self):
-        settings = {
-            "left_label_text": self.left_label_text.get(),
-            "left_count": self.left_count.get(),
-            "left_bg_color": self.left_bg_color.get(),
-            "left_font_color": self.left_font_color.get(),
-            "left_font_size": self.left_font_size.get(),
-            "left_font_family": self.left_font_family.get(),
-            "left_bg_image_path": self.left_bg_image_path.get(),
-            "right_label_text": self.right_label_text.get(),
-            "right_count": self.right_count.get(),
-            "right_font_color": self.right_font_color.get(),
-            "right_font_size": self.right_font_size.get(),
-            "right_font_family": self.right_font_family.get(),
-            "right_include_in_viewer": self.right_include_in_viewer.get(),
-            "viewer_spacing": self.viewer_spacing.get(),
-            "hotkeys": {}
-        }
-        for action, hotkey in self.hotkeys.items():
-            key_str = str(hotkey["key"])
-            settings["hotkeys"][action] = {
+        settings = self.engine.to_dict()
+        settings["hotkey_repeat_policy"] = self.hotkey_repeat_policy
+        settings["overlay_server"] = self.overlay_settings
+        settings["control_server"] = self.control_settings
+        settings["text_output"] = self.text_output_settings
+        settings["shared_state"] = self.shared_state_settings
+        settings["image_output"] = self.image_output_settings
+        if self.viewer_window:
+            self.viewer_window_settings["geometry"] = self.viewer_window.geometry()
+        settings["viewer_window"] = self.viewer_window_settings
+        settings["background"] = self.background_settings
+        settings["rollover"] = self.rollover_settings
+        settings["rollover_day"] = self.rollover_day
+        settings["last_active"] = time.time()
+        settings["session_started"] = self.session_started
+        settings["hotkeys"] = self.serialize_hotkeys(self.hotkeys)
+        settings["active_profile"] = self.active_profile
+        settings["profiles"] = self.profiles
+        write_atomic(self.settings_file, json.dumps(settings))
+        self.journal.clear()
+        self.snapshot_pending = False
+
+    def serialize_hotkeys(self, hotkeys):
+        serialized = {}
+        for action, hotkey in hotkeys.items():
+            key_str = str(hotkey["key"]) if hotkey["key"] is not None else ""
+            serialized[action] = {
                 "ctrl": hotkey.get("ctrl", False),
                 "shift": hotkey.get("shift", False),
                 "alt": hotkey.get("alt", False),
                 "key": key_str
             }
-        with open(self.settings_file, "w") as f:
-            json.dump(settings, f)
+        return serialized
+
+    def parse_hotkeys(self, serialized):
+        hotkeys = {}
+        for action, hotkey in serialized.items():
+            side, _, op = action.partition("_")
+            if side in LEGACY_SIDES:
+                action = hotkey_action(LEGACY_SIDES[side], op)
+            key_str = hotkey["key"]
+            if not key_str:
+                key = None
+            elif "Key." in key_str:
+                key_str = key_str.replace("Key.", "")
+                key = getattr(keyboard.Key, key_str, None)
+            else:
+                key = key_str
+            hotkeys[action] = {
+                "ctrl": hotkey["ctrl"],
+                "shift": hotkey["shift"],
+                "alt": hotkey["alt"],
+                "key": key
+            }
+        return hotkeys
 
     def load_settings(self):
+        settings = {}
         if os.path.exists(self.settings_file):
             with open(self.settings_file, "r") as f:
                 settings = json.load(f)
-                self.left_label_text.set(settings.get("left_label_text", "Deaths:"))
-                self.left_count.set(settings.get("left_count", 0))
-                self.left_bg_color.set(settings.get("left_bg_color", "#ffffff"))
-                self.left_font_color.set(settings.get("left_font_color", "#000000"))
-                self.left_font_size.set(settings.get("left_font_size", 12))
-                self.left_font_family.set(settings.get("left_font_family", "Arial"))
-                left_bg_image_path = settings.get("left_bg_image_path", "")
-                self.left_bg_image_path.set(left_bg_image_path)
-                if left_bg_image_path and os.path.exists(left_bg_image_path):
-                    self.left_bg_image = Image.open(left_bg_image_path)
-
-                self.right_label_text.set(settings.get("right_label_text", "Deaths Today:"))
-                self.right_count.set(settings.get("right_count", 0))
-                self.right_font_color.set(settings.get("right_font_color", "#000000"))
-                self.right_font_size.set(settings.get("right_font_size", 12))
-                self.right_font_family.set(settings.get("right_font_family", "Arial"))
-                self.right_include_in_viewer.set(settings.get("right_include_in_viewer", True))
-                self.viewer_spacing.set(settings.get("viewer_spacing", 10))
-
-                if "hotkeys" in settings:
-                    for action, hotkey in settings["hotkeys"].items():
-                        key_str = hotkey["key"]
-                        if "Key." in key_str:
-                            key_str = key_str.replace("Key.", "")
-                            key = getattr(keyboard.Key, key_str, None)
-                        else:
-                            key = key_str
-                        self.hotkeys[action] = {
-                            "ctrl": hotkey["ctrl"],
-                            "shift": hotkey["shift"],
-                            "alt": hotkey["alt"],
-                            "key": key
-                        }
+
+        if not settings.get("counters"):
+            settings.update(self.migrate_legacy_settings(settings))
+        self.engine.load_dict(settings)
+        self.hotkey_repeat_policy = settings.get("hotkey_repeat_policy", "ignore")
+        self.overlay_settings.update(settings.get("overlay_server", {}))
+        self.control_settings.update(settings.get("control_server", {}))
+        self.text_output_settings.update(settings.get("text_output", {}))
+        self.shared_state_settings.update(settings.get("shared_state", {}))
+        self.image_output_settings.update(settings.get("image_output", {}))
+        self.viewer_window_settings.update(settings.get("viewer_window", {}))
+        self.background_settings.update(settings.get("background", {}))
+        self.rollover_settings.update(settings.get("rollover", {}))
+        self.rollover_day = settings.get("rollover_day")
+        self.last_active = settings.get("last_active", 0)
+        self.session_started = settings.get("session_started", 0)
+
+        if "hotkeys" in settings:
+            self.hotkeys.update(self.parse_hotkeys(settings["hotkeys"]))
+
+        self.active_profile = settings.get("active_profile", self.active_profile)
+        self.profiles = settings.get("profiles") or {self.active_profile: None}
+        self.profiles[self.active_profile] = None
+
+        # Replay counter changes journaled since the last snapshot
+        for index, value in self.journal.replay().items():
+            index = LEGACY_SIDES.get(index, index)
+            if isinstance(index, int) and index < len(self.engine.counters):
+                self.engine.set_count(index, value)
+        self.last_active = max(self.last_active, self.journal.last_timestamp)
+
+    def migrate_legacy_settings(self, settings):
+        # Translate the fixed left/right settings layout (also used when there is no settings file)
+        return {
+            "counters": [
+                {
+                    "label_text": settings.get("left_label_text", "Deaths:"),
+                    "count": settings.get("left_count", 0),
+                    "font_color": settings.get("left_font_color", "#000000"),
+                    "font_size": settings.get("left_font_size", 12),
+                    "font_family": settings.get("left_font_family", "Arial"),
+                    "include_in_viewer": True,
+                },
+                {
+                    "label_text": settings.get("right_label_text", "Deaths Today:"),
+                    "count": settings.get("right_count", 0),
+                    "font_color": settings.get("right_font_color", "#000000"),
+                    "font_size": settings.get("right_font_size", 12),
+                    "font_family": settings.get("right_font_family", "Arial"),
+                    "include_in_viewer": settings.get("right_include_in_viewer", True),
+                },
+            ],
+            "viewer": {
+                "bg_color": settings.get("left_bg_color", "#ffffff"),
+                "bg_image_path": settings.get("left_bg_image_path", ""),
+                "spacing": settings.get("viewer_spacing", 10),
+            },
+        }
 
     def on_closing(self):
         self.save_settings()
+        self.history.save(self.history_file)
+        if self.text_output:
+            self.text_output.flush(force=True)
+        if self.overlay_server:
+            self.overlay_server.stop()
+        if self.control_server:
+            self.control_server.stop()
+        if self.shared_state:
+            self.shared_state.close()
+        self.key_listener.stop()
+        if self.key_trace:
+            self.key_trace.close()
         self.root.destroy()
 
 def main():
+    parser = argparse.ArgumentParser(description="Stream Counter")
+    parser.add_argument("--overlay-port", type=int,
+                        help="serve the OBS browser source overlay on this port (overrides the settings file)")
+    parser.add_argument("--control-port", type=int,
+                        help="accept control commands on this localhost port (overrides the settings file)")
+    parser.add_argument("--base-path",
+                        help="directory for the settings, journal and caches (defaults to the program directory)")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="report the time to first paint to startup_timing.json and exit")
+    parser.add_argument("--record-keys", metavar="PATH",
+                        help="record every key event (all typing, not only hotkeys) to a trace file for "
+                             "hotkey_replay.py")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = StreamCounter(root)
+    app = StreamCounter(root, overlay_port=args.overlay_port, base_path=args.base_path,
+                        control_port=args.control_port, record_keys=args.record_keys)
+    if args.startup_timing:
+        constructed = time.perf_counter()
+        # Idle callbacks run after the pending redraws, so this fires once the window is painted
+        root.after_idle(lambda: report_startup_timing(app, constructed))
     root.mainloop()
 
+def report_startup_timing(app, constructed):
+    app.root.update_idletasks()
+    painted = time.perf_counter()
+    timing = {
+        "construct_ms": round((constructed - STARTUP_STARTED) * 1000, 2),
+        "first_paint_ms": round((painted - STARTUP_STARTED) * 1000, 2),
+        "pil_loaded": "PIL" in sys.modules,
+    }
+    print(json.dumps(timing))
+    with open(os.path.join(app.base_path, "startup_timing.json"), "w") as f:
+        json.dump(timing, f)
+    app.on_closing()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
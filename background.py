@@ -0,0 +1,204 @@
+from collections import OrderedDict
+import hashlib
+import math
+import os
+import threading
+import time
+
+# PIL is imported on first use so startup without a background image never loads it
+
+ANIMATED_EXTENSIONS = (".gif", ".png", ".apng", ".webp")
+MAX_ANIMATION_PIXELS = 24 * 1024 * 1024  # Scaled frames kept per animation (~96 MB); longer ones drop frames
+MIN_FRAME_DURATION = 20  # Milliseconds; like browsers, shorter (or missing) durations play at 100
+
+
+class BackgroundSource:
+    # A background image file decoded only as large as the viewer needs. The retained image is capped
+    # at source_scale times the largest viewer size requested so far; JPEGs are decoded at reduced
+    # scale (draft mode) instead of at full resolution. Nothing is decoded until the first request.
+    def __init__(self, path, source_scale=2.0):
+        stat = os.stat(path)
+        self.path = path
+        self.source_scale = source_scale
+        # Identifies this exact file version in the disk cache
+        self.key = hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:16]
+        self._image = None
+        self._complete = False  # The retained image is the full-resolution original
+        self._largest = (0, 0)
+        self._animated = None
+
+    def image(self, size):
+        self._largest = (max(self._largest[0], size[0]), max(self._largest[1], size[1]))
+        needed = (math.ceil(self._largest[0] * self.source_scale), math.ceil(self._largest[1] * self.source_scale))
+        if self._image is None or not (self._complete or
+                                       (self._image.width >= needed[0] and self._image.height >= needed[1])):
+            self._image = self._decode(needed)
+        return self._image
+
+    def is_animated(self):
+        if self._animated is None:
+            self._animated = False
+            if self.path.lower().endswith(ANIMATED_EXTENSIONS):
+                from PIL import Image
+                with Image.open(self.path) as image:
+                    self._animated = getattr(image, "is_animated", False)
+        return self._animated
+
+    def frames(self, size):
+        # Decode the animation one frame at a time, keeping only copies scaled to size, as
+        # [(image, duration_ms)]. Frames over the pixel budget are merged into their predecessors.
+        # Touches no Tk state, so it runs on a worker thread; BackgroundCache.add_frames wraps the
+        # result in PhotoImages.
+        from PIL import Image, ImageSequence
+        frames = []
+        step = 1  # Every step-th frame is kept and shown for the duration of the ones it stands for
+        with Image.open(self.path) as image:
+            for number, frame in enumerate(ImageSequence.Iterator(image)):
+                duration = frame.info.get("duration", 0)
+                if duration < MIN_FRAME_DURATION:
+                    duration = 100
+                if number % step:
+                    frames[-1] = (frames[-1][0], frames[-1][1] + duration)
+                    continue
+                scaled = frame.convert("RGBA").resize(size, Image.Resampling.LANCZOS)
+                frames.append((scaled, duration))
+                if len(frames) * size[0] * size[1] > MAX_ANIMATION_PIXELS:
+                    # Halve the frame rate rather than grow past the budget
+                    frames = [(frames[i][0], sum(duration for _, duration in frames[i:i + 2]))
+                              for i in range(0, len(frames), 2)]
+                    step *= 2
+        return frames
+
+    def _decode(self, needed):
+        from PIL import Image
+        image = Image.open(self.path)
+        full_size = image.size
+        if image.format == "JPEG":
+            image.draft("RGB", needed)
+        image.load()
+        # The viewer stretches the image to fill it, so each side is capped on its own
+        capped = (min(image.width, needed[0]), min(image.height, needed[1]))
+        if capped != image.size:
+            image = image.resize(capped, Image.Resampling.LANCZOS)
+        self._complete = image.size == full_size
+        return image
+
+
+def open_image(path, source_scale=2.0):
+    return BackgroundSource(path, source_scale)
+
+
+class BackgroundCache:
+    # Rendered background images keyed by (source key, canvas size), least recently used evicted
+    # first. With a cache directory, every rendered size is also written there as a PNG so a later
+    # start can show the background without decoding the source image at all.
+    def __init__(self, max_entries=8, cache_dir=None, max_disk_entries=32):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._animation = None
+
+    def get_frames(self, source, size):
+        # [(PhotoImage, duration_ms)] for an animated source, or None until add_frames has wrapped
+        # its frames at this size; only the last size is kept
+        if self._animation is not None and self._animation[0] == (source.key, size):
+            return self._animation[1]
+        return None
+
+    def add_frames(self, source_key, size, frames, budget):
+        # Tk thread only: wrap frames from BackgroundSource.frames in PhotoImages in place, for at
+        # most budget seconds per call (and at least one frame), each PIL copy released as it is
+        # wrapped. Returns True once all are wrapped and get_frames serves them.
+        from PIL import ImageTk
+        started = time.perf_counter()
+        wrapped = 0
+        for index, (image, duration) in enumerate(frames):
+            if isinstance(image, ImageTk.PhotoImage):
+                continue
+            if wrapped and time.perf_counter() - started >= budget:
+                return False
+            frames[index] = (ImageTk.PhotoImage(image), duration)
+            wrapped += 1
+        self._animation = ((source_key, size), frames)
+        return True
+
+    def get(self, source, size):
+        key = (source.key, size)
+        photo = self._entries.get(key)
+        if photo is not None:
+            self._entries.move_to_end(key)
+            return photo
+
+        return self.insert(source, size, self.prepare(source, size))
+
+    def prepare(self, source, size):
+        # The scaled image from the disk cache, or rendered and stored there. Touches no Tk state,
+        # so it can run on a worker thread (with a source object of its own).
+        from PIL import Image
+        image = self._load_scaled(source.key, size)
+        if image is None:
+            image = source.image(size).resize(size, Image.Resampling.LANCZOS)
+            self._store_scaled(source.key, size, image)
+        return image
+
+    def insert(self, source, size, image):
+        # Tk thread only: turn a prepared image into the PhotoImage served by get()
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(image)
+        self._entries[(source.key, size)] = photo
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return photo
+
+    def contains(self, source, size):
+        return (source.key, size) in self._entries
+
+    def _scaled_path(self, source_key, size):
+        return os.path.join(self.cache_dir, f"{source_key}_{size[0]}x{size[1]}.png")
+
+    def _load_scaled(self, source_key, size):
+        if not self.cache_dir:
+            return None
+        from PIL import Image
+        path = self._scaled_path(source_key, size)
+        try:
+            with Image.open(path) as image:
+                image.load()
+        except (OSError, ValueError):
+            return None
+        # Touch it so pruning drops the least recently used variants
+        os.utime(path)
+        return image
+
+    def _store_scaled(self, source_key, size, image):
+        if not self.cache_dir:
+            return
+        path = self._scaled_path(source_key, size)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            image.save(temp_path, "PNG", compress_level=1)
+            os.replace(temp_path, path)
+            self._prune()
+        except OSError:
+            pass  # The disk cache is only an optimization
+
+    def _prune(self):
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".png")]
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def clear(self, disk=False):
+        self._entries.clear()
+        self._animation = None
+        if disk and self.cache_dir and os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".png"):
+                    os.remove(entry.path)
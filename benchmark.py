@@ -0,0 +1,232 @@
+# Benchmarks for StreamCounter: hotkey-to-paint latency, render cost, settings round-trips and
+# cold start. Needs a display; on a headless machine run it under Xvfb:
+#
+#   xvfb-run -a python benchmark.py --output bench.json
+#
+# Results are JSON (times in microseconds unless noted) so runs can be compared across commits.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def summarize(samples_ns):
+    samples = sorted(samples_ns)
+    count = len(samples)
+
+    def pick(fraction):
+        return round(samples[min(count - 1, int(fraction * count))] / 1000, 2)
+
+    return {
+        "count": count,
+        "mean": round(sum(samples) / count / 1000, 2),
+        "min": round(samples[0] / 1000, 2),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": round(samples[-1] / 1000, 2),
+    }
+
+
+def make_app(base_path):
+    from StreamCounter import StreamCounter
+    root = tk.Tk()
+    app = StreamCounter(root, base_path=base_path)
+    root.update()
+    return app
+
+
+def bench_hotkeys(app, events):
+    # Drive the listener callbacks directly with the keys pynput would deliver for Ctrl+Shift+F1
+    from pynput import keyboard
+    app.hotkeys["counter1_increment"] = {"ctrl": True, "shift": True, "alt": False, "key": keyboard.Key.f1}
+    app.compile_hotkeys()
+    app.on_hotkey_press(keyboard.Key.ctrl_l)
+    app.on_hotkey_press(keyboard.Key.shift_l)
+
+    press_ns = []
+    latency_ns = []
+    start_count = app.engine.counters[0].count
+    started = time.perf_counter_ns()
+    for _ in range(events):
+        t0 = time.perf_counter_ns()
+        app.on_hotkey_press(keyboard.Key.f1)
+        t1 = time.perf_counter_ns()
+        app.on_hotkey_release(keyboard.Key.f1)
+        # Hotkey to paint: apply the queued command, render and let Tk flush the redraw
+        app.run_frame()
+        app.root.update_idletasks()
+        t2 = time.perf_counter_ns()
+        press_ns.append(t1 - t0)
+        latency_ns.append(t2 - t0)
+    elapsed = time.perf_counter_ns() - started
+
+    # Burst: every press lands in the queue before a single frame applies them all
+    burst_started = time.perf_counter_ns()
+    for _ in range(events):
+        app.on_hotkey_press(keyboard.Key.f1)
+        app.on_hotkey_release(keyboard.Key.f1)
+    app.run_frame()
+    app.root.update_idletasks()
+    burst_elapsed = time.perf_counter_ns() - burst_started
+
+    app.on_hotkey_release(keyboard.Key.shift_l)
+    app.on_hotkey_release(keyboard.Key.ctrl_l)
+    return {
+        "listener_press": summarize(press_ns),
+        "hotkey_to_paint": summarize(latency_ns),
+        "events_per_second": round(events / (elapsed / 1e9), 1),
+        "burst_events_per_second": round(events / (burst_elapsed / 1e9), 1),
+        "final_count_ok": app.engine.counters[0].count == start_count + 2 * events,
+    }
+
+
+def bench_update_display(app, iterations):
+    samples = []
+    for _ in range(iterations):
+        app.engine.increment(0)
+        t0 = time.perf_counter_ns()
+        app.update_display()
+        app.root.update_idletasks()
+        samples.append(time.perf_counter_ns() - t0)
+    return summarize(samples)
+
+
+def bench_background(app, iterations):
+    cold = []
+    disk = []
+    warm = []
+    for _ in range(iterations):
+        app.bg_cache.clear(disk=True)
+        t0 = time.perf_counter_ns()
+        app.update_background()
+        app.root.update_idletasks()
+        cold.append(time.perf_counter_ns() - t0)
+        # As on a restart: the scaled image is read back from the disk cache
+        app.bg_cache.clear()
+        t0 = time.perf_counter_ns()
+        app.update_background()
+        app.root.update_idletasks()
+        disk.append(time.perf_counter_ns() - t0)
+        t0 = time.perf_counter_ns()
+        app.update_background()
+        app.root.update_idletasks()
+        warm.append(time.perf_counter_ns() - t0)
+    return {"resize_cold": summarize(cold), "resize_disk_cached": summarize(disk), "resize_cached": summarize(warm)}
+
+
+def bench_settings(app, iterations):
+    save = []
+    load = []
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        app.save_settings()
+        t1 = time.perf_counter_ns()
+        app.load_settings()
+        app.root.update_idletasks()
+        t2 = time.perf_counter_ns()
+        save.append(t1 - t0)
+        load.append(t2 - t1)
+    return {"save_settings": summarize(save), "load_settings": summarize(load)}
+
+
+def bench_compositor(iterations):
+    # Offscreen frames as a count goes up: only the changed digit cells are redrawn
+    from compositor import OverlayCompositor, FontIndex
+    font_index = FontIndex()
+    font_index.wait()
+    compositor = OverlayCompositor((1280, 720), font_index=font_index)
+    render = []
+    encode = []
+    for count in range(iterations):
+        items = [(f"Deaths: {count}", ("Arial", 24), "#000000", True),
+                 (f"Deaths Today: {count // 3}", ("Arial", 24), "#000000", True)]
+        t0 = time.perf_counter_ns()
+        compositor.render("#336699", None, 10, items)
+        t1 = time.perf_counter_ns()
+        compositor.png_bytes()
+        t2 = time.perf_counter_ns()
+        render.append(t1 - t0)
+        encode.append(t2 - t1)
+    return {"render": summarize(render), "png_encode": summarize(encode)}
+
+
+def bench_cold_start(runs):
+    paint = []
+    construct = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as base_path:
+            output = subprocess.run(
+                [sys.executable, os.path.join(BASE_DIR, "StreamCounter.py"), "--startup-timing",
+                 "--base-path", base_path],
+                capture_output=True, text=True, check=True).stdout
+            timing = json.loads(output.strip().splitlines()[-1])
+        construct.append(timing["construct_ms"] * 1000)
+        paint.append(timing["first_paint_ms"] * 1000)
+    # summarize() scales its input down by 1000, so these come out in milliseconds
+    return {"construct_ms": summarize(construct), "first_paint_ms": summarize(paint)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark StreamCounter")
+    parser.add_argument("--events", type=int, default=2000, help="synthetic hotkey presses")
+    parser.add_argument("--iterations", type=int, default=200, help="iterations per render/settings benchmark")
+    parser.add_argument("--cold-starts", type=int, default=5, help="cold start runs (0 to skip)")
+    parser.add_argument("--image-size", default="3840x2160", help="size of the generated background image")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    with tempfile.TemporaryDirectory() as base_path:
+        app = make_app(base_path)
+        results["hotkeys"] = bench_hotkeys(app, args.events)
+        results["update_display"] = bench_update_display(app, args.iterations)
+
+        from PIL import Image
+        width, height = (int(value) for value in args.image_size.split("x"))
+        image_path = os.path.join(base_path, "background.png")
+        Image.new("RGB", (width, height), "#336699").save(image_path)
+        app.engine.set_viewer(bg_image_path=image_path)
+        app.run_frame()
+        app.root.update()
+        results["update_display_with_background"] = bench_update_display(app, args.iterations)
+        results["background"] = bench_background(app, max(1, args.iterations // 20))
+
+        results["settings"] = bench_settings(app, max(1, args.iterations // 10))
+        results["compositor"] = bench_compositor(args.iterations)
+        app.root.destroy()
+
+    if args.cold_starts:
+        results["cold_start"] = bench_cold_start(args.cold_starts)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
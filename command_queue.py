@@ -0,0 +1,77 @@
+from collections import deque
+
+from counter_engine import MAX_COUNT
+
+
+class CommandQueue:
+    # Counter commands pushed from other threads and drained in one batch per frame on the Tk thread.
+    # A command is (op, target, amount) where op is "add" (amount may be negative) or "set".
+    # deque.append and popleft are atomic, so producers and the Tk thread never wait on each other.
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._commands = deque()
+        self.pushed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    def push(self, op, target, amount):
+        depth = len(self._commands)
+        if depth >= self.maxsize:
+            self.dropped += 1
+            return False
+        self._commands.append((op, target, amount))
+        self.pushed += 1
+        if depth + 1 > self.max_depth:
+            self.max_depth = depth + 1
+        return True
+
+    def push_many(self, commands):
+        # All or nothing; one extend() so a frame never drains half of the batch
+        depth = len(self._commands)
+        if depth + len(commands) > self.maxsize:
+            self.dropped += len(commands)
+            return False
+        self._commands.extend(commands)
+        self.pushed += len(commands)
+        if depth + len(commands) > self.max_depth:
+            self.max_depth = depth + len(commands)
+        return True
+
+    def depth(self):
+        return len(self._commands)
+
+    def drain(self):
+        # Take only what is there now; anything pushed meanwhile waits for the next frame
+        commands = []
+        for _ in range(len(self._commands)):
+            commands.append(self._commands.popleft())
+        return commands
+
+    def fold(self, commands, get_value, added=None):
+        # Fold commands into one final value per target. Steps are applied in order so the
+        # result matches running them one by one (counts never go below zero). If given, `added`
+        # collects the net change each target got from "add" steps alone, so a reset or set in
+        # the batch is never mistaken for a run of increments or decrements.
+        values = {}
+        for op, target, amount in commands:
+            value = values[target] if target in values else get_value(target)
+            if op == "add":
+                new_value = min(max(0, value + amount), MAX_COUNT)
+                if added is not None:
+                    added[target] = added.get(target, 0) + new_value - value
+                value = new_value
+            elif op == "set":
+                value = min(max(0, amount), MAX_COUNT)
+            values[target] = value
+        self.coalesced += len(commands) - len(values)
+        return values
+
+    def stats(self):
+        return {
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+            "pushed": self.pushed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
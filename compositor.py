@@ -0,0 +1,263 @@
+# Offscreen rendering of the viewer with PIL, for image sources and recording pipelines. Text is
+# drawn from cached per-character cells, and a frame that differs from the previous one only in some
+# characters (the usual count change) restores and re-blits just those cells.
+from collections import OrderedDict
+import io
+import json
+import os
+import threading
+
+from PIL import Image, ImageDraw, ImageFont
+
+from background import BackgroundSource
+from font_cache import font_directories, directories_fingerprint
+from journal import write_atomic
+
+POINTS_TO_PIXELS = 96 / 72  # Tk font sizes are points; PIL wants pixels
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+
+def _normalize(name):
+    return "".join(name.lower().split())
+
+
+def default_font(pixels):
+    try:
+        return ImageFont.load_default(pixels)
+    except TypeError:
+        return ImageFont.load_default()  # Pillow before 10.1 only has the small bitmap font
+
+
+class FontIndex:
+    # Normalized family and file names -> font files. Reading every file's family name is slow with
+    # thousands of fonts installed, so the index is built on a worker thread and cached on disk under
+    # the same directory fingerprint as the font list. Until it is ready, text uses PIL's default font.
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.files = None  # Assigned once, when the index is complete
+        self._ready = threading.Event()
+        threading.Thread(target=self._build, daemon=True).start()
+
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def find(self, family):
+        files = self.files
+        return files.get(_normalize(family)) if files else None
+
+    def _build(self):
+        fingerprint = directories_fingerprint()
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == fingerprint:
+                self.files = cached["files"]
+                self._ready.set()
+                return
+        except (TypeError, OSError, ValueError, KeyError):
+            pass
+
+        files = {}
+        for directory in font_directories():
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    stem, extension = os.path.splitext(filename)
+                    if extension.lower() in FONT_EXTENSIONS:
+                        files.setdefault(_normalize(stem), os.path.join(dirpath, filename))
+        # File names often differ from family names (times.ttf is Times New Roman)
+        for path in set(files.values()):
+            try:
+                files.setdefault(_normalize(ImageFont.truetype(path, 10).getname()[0]), path)
+            except OSError:
+                continue
+        if self.cache_path:
+            try:
+                write_atomic(self.cache_path, json.dumps({"key": fingerprint, "files": files}), fsync=False)
+            except OSError:
+                pass
+        self.files = files
+        self._ready.set()
+
+
+class OverlayCompositor:
+    def __init__(self, size, transparent=False, font_index=None, max_glyphs=2048):
+        self.size = size
+        self.transparent = transparent
+        self.font_index = font_index
+        self.max_glyphs = max_glyphs
+        self.frame = None
+        self._fonts_ready = False
+        self._fonts = {}
+        self._glyphs = OrderedDict()
+        self._base = None
+        self._base_key = None
+        self._lines = []
+
+    def _font(self, family, size):
+        key = (family, size)
+        font = self._fonts.get(key)
+        if font is None:
+            pixels = max(1, round(size * POINTS_TO_PIXELS))
+            path = self.font_index.find(family) if self.font_index else None
+            try:
+                font = ImageFont.truetype(path, pixels) if path else default_font(pixels)
+            except OSError:
+                font = default_font(pixels)
+            self._fonts[key] = font
+        return font
+
+    def _glyph(self, font_key, color, char):
+        # One character drawn into a cell as wide as its advance and as tall as the line
+        key = (font_key, color, char)
+        glyph = self._glyphs.get(key)
+        if glyph is not None:
+            self._glyphs.move_to_end(key)
+            return glyph
+        font = self._font(*font_key)
+        ascent, descent = font.getmetrics()
+        cell = Image.new("RGBA", (max(1, round(font.getlength(char))), ascent + descent), (0, 0, 0, 0))
+        ImageDraw.Draw(cell).text((0, 0), char, font=font, fill=color)
+        self._glyphs[key] = cell
+        if len(self._glyphs) > self.max_glyphs:
+            self._glyphs.popitem(last=False)
+        return cell
+
+    def _update_base(self, bg_color, background):
+        # background is an object with .key and .image(size) (a BackgroundSource), or None
+        key = (bg_color, background.key if background is not None else None, self.transparent)
+        if key == self._base_key:
+            return False
+        if self.transparent:
+            base = Image.new("RGBA", self.size, (0, 0, 0, 0))
+        else:
+            base = Image.new("RGBA", self.size, bg_color)
+            if background is not None:
+                # A source of its own, decoded for this frame size and then dropped, so the output
+                # size never raises the retained resolution of the viewer's shared source
+                image = BackgroundSource(background.path, 1.0).image(self.size)
+                base.alpha_composite(image.convert("RGBA").resize(self.size, Image.Resampling.LANCZOS))
+        self._base = base
+        self._base_key = key
+        return True
+
+    def _layout(self, spacing, items):
+        # Visible labels stacked and centered like the Tk viewer: (text, font_key, color, x, y, cells)
+        lines = []
+        for text, font_key, color, visible in items:
+            if not visible:
+                continue
+            cells = [self._glyph(font_key, color, char) for char in text]
+            lines.append([text, font_key, color, sum(cell.width for cell in cells),
+                          cells[0].height if cells else 0, cells])
+        total = sum(line[4] + 2 * spacing for line in lines)
+        y = (self.size[1] - total) // 2
+        laid_out = []
+        for text, font_key, color, width, height, cells in lines:
+            y += spacing
+            laid_out.append((text, font_key, color, (self.size[0] - width) // 2, y, height, cells))
+            y += height + spacing
+        return laid_out
+
+    def fonts_changed(self):
+        # True once the font index has become ready and the frame still uses the fallback fonts
+        return self.font_index is not None and self.font_index.ready() != self._fonts_ready
+
+    def render(self, bg_color, background, spacing, items):
+        # items holds one (text, (family, size), color, visible) tuple per counter, as for the viewer
+        if self.fonts_changed():
+            self._fonts_ready = True
+            self._fonts.clear()
+            self._glyphs.clear()
+            self.frame = None
+        new_base = self._update_base(bg_color, background)
+        lines = self._layout(spacing, items)
+        full = (new_base or self.frame is None or len(lines) != len(self._lines) or
+                any(old[4:6] != new[4:6] for old, new in zip(self._lines, lines)))
+        if full:
+            self.frame = self._base.copy()
+            for line in lines:
+                self._draw(line, 0, len(line[0]))
+        else:
+            for old, new in zip(self._lines, lines):
+                if old[:4] == new[:4]:
+                    continue
+                if old[1:4] == new[1:4] and len(old[0]) == len(new[0]):
+                    # Same font, color and position: only the differing characters are redrawn
+                    changed = [i for i, (a, b) in enumerate(zip(old[0], new[0])) if a != b]
+                    for index in changed:
+                        self._draw(new, index, index + 1, restore=True)
+                else:
+                    self._restore(old, 0, len(old[0]))
+                    self._draw(new, 0, len(new[0]), restore=True)
+        self._lines = lines
+        return self.frame
+
+    def _cell_x(self, line, index):
+        return line[3] + sum(cell.width for cell in line[6][:index])
+
+    def _restore(self, line, start, end):
+        x = self._cell_x(line, start)
+        box = (x, line[4], x + sum(cell.width for cell in line[6][start:end]), line[4] + line[5])
+        self.frame.paste(self._base.crop(box), box[:2])
+
+    def _draw(self, line, start, end, restore=False):
+        if restore:
+            self._restore(line, start, end)
+        x = self._cell_x(line, start)
+        y = line[4]
+        for cell in line[6][start:end]:
+            width = cell.width
+            if x < 0 or y < 0:
+                # Text larger than the frame; alpha_composite needs a non-negative destination
+                if x + width <= 0:
+                    x += width
+                    continue
+                cell = cell.crop((max(0, -x), max(0, -y), width, cell.height))
+            self.frame.alpha_composite(cell, (max(0, x), max(0, y)))
+            x += width
+
+    def png_bytes(self):
+        buffer = io.BytesIO()
+        self.frame.save(buffer, "PNG", compress_level=1)
+        return buffer.getvalue()
+
+    def save_png(self, path):
+        # Atomic, so an image source polling the file never loads a half-written frame
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.png_bytes())
+        os.replace(temp_path, path)
+
+
+class FrameWriter:
+    # Writes frames to a PNG file on a worker thread so encoding never holds up the Tk thread. Only
+    # the newest frame matters: one submitted while the previous is still being written replaces
+    # any frame waiting behind it.
+    def __init__(self, path):
+        self.path = path
+        self.written = 0
+        self._pending = None
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, frame):
+        self._pending = frame.copy()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            frame, self._pending = self._pending, None
+            if frame is None:
+                continue
+            temp_path = f"{self.path}.tmp"
+            try:
+                frame.save(temp_path, "PNG", compress_level=1)
+                os.replace(temp_path, self.path)
+                self.written += 1
+            except OSError:
+                pass  # e.g. the file is locked by a reader on Windows; the next frame tries again
@@ -0,0 +1,68 @@
+# Command line client for the StreamCounter control server (see control_server.py for the commands).
+#
+#   python control_client.py inc 1          python control_client.py "set 2 40; get"
+#   python control_client.py --port 8766 '{"op": "reset", "counter": "all"}'
+#   some_bot | python control_client.py -   (one command per line from stdin, pipelined)
+import argparse
+import socket
+import sys
+import threading
+
+from control_server import DEFAULT_PORT
+
+
+def connect(host, port, socket_path):
+    if socket_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    else:
+        sock = socket.create_connection((host, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def send_stream(sock, lines, quiet):
+    # Writes run ahead of the replies; a reader thread prints them as they arrive
+    replies = sock.makefile("r", encoding="utf-8")
+    failures = []
+
+    def read_replies():
+        for reply in replies:
+            if reply.startswith("error") or reply.startswith('{"ok": false'):
+                failures.append(reply)
+                sys.stderr.write(reply)
+            elif not quiet:
+                sys.stdout.write(reply)
+
+    reader = threading.Thread(target=read_replies)
+    reader.start()
+    with sock.makefile("w", encoding="utf-8") as out:
+        for line in lines:
+            if line.strip():
+                out.write(line.strip() + "\n")
+    sock.shutdown(socket.SHUT_WR)
+    reader.join()
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send commands to a running Stream Counter")
+    parser.add_argument("command", nargs="+", help='a command such as "inc 1 5", or - to read commands from stdin')
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="Unix socket path (instead of --host/--port)")
+    parser.add_argument("--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args()
+
+    try:
+        sock = connect(args.host, args.port, args.socket)
+    except OSError as e:
+        sys.exit(f"Could not connect to Stream Counter: {e}")
+    with sock:
+        if args.command == ["-"]:
+            sys.exit(send_stream(sock, sys.stdin, args.quiet))
+        sys.exit(send_stream(sock, [" ".join(args.command)], args.quiet))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# Local control endpoint for scripts, bots and Stream Deck buttons. Runs its own asyncio loop on a
+# daemon thread like the overlay server (see threaded_server.py). Commands are parsed there and pushed to the CommandQueue,
+# so they are applied on the Tk thread in the same per-frame batches as hotkeys.
+#
+# One command per line, either text or JSON. Counters are numbered from 1, as in the UI.
+#   inc 1 5 | dec 2 | set 1 40 | reset all | get | get 2      (";" separates commands on one line)
+#   profile Elden Ring | profile next
+#   {"op": "add", "counter": 1, "amount": 5}   {"op": "set", "counter": "all", "value": 0}
+#   {"op": "reset", "counter": [1, 2]}   {"op": "get"}   {"op": "batch", "commands": [...]}
+#   {"op": "profile", "name": "Elden Ring"}   {"op": "profile", "name": null}  (next profile)
+# Text commands get text replies ("ok", "error ...", or the counts), JSON commands JSON replies.
+# A line that is not a valid command gets its error reply and ends the connection, so an HTTP request
+# a web page sends to this port (request line first) never reaches the commands in its body.
+# Counts reported by "get" are those applied as of the last frame, with the commands earlier on the
+# same line folded in, so "set 2 40; get" already shows 40. The new profile's counts are not known
+# until a frame has switched to it, so a "get" after a "profile" on the same line is an error.
+import asyncio
+import json
+import os
+import socket
+
+from counter_engine import MAX_COUNT
+from threaded_server import ThreadedServer
+
+DEFAULT_PORT = 8766
+MAX_LINE = 64 * 1024
+
+TEXT_COMMANDS = ("inc", "dec", "set", "reset", "get", "profile")
+
+
+class CommandError(ValueError):
+    pass
+
+
+class ControlServer(ThreadedServer):
+    def __init__(self, command_queue, host="127.0.0.1", port=DEFAULT_PORT, socket_path=""):
+        super().__init__()
+        self.command_queue = command_queue
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        # Published by the Tk thread after each frame that changed something; replaced, never mutated
+        self.counts = ()
+        self.profiles = ()
+
+    def address(self):
+        return self.socket_path or f"{self.host}:{self.port}"
+
+    async def _start_server(self):
+        if not self.socket_path:
+            server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_LINE)
+            self.port = server.sockets[0].getsockname()[1]
+            return server
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # Left behind by a previous run
+        try:
+            return await asyncio.start_unix_server(self._handle, self.socket_path, limit=MAX_LINE)
+        except (AttributeError, NotImplementedError) as e:
+            raise OSError(f"no Unix sockets on this platform ({e})")
+
+    def _closed(self):
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    async def _serve(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != getattr(socket, "AF_UNIX", None):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8", "replace").strip()
+                if line:
+                    reply, valid = self._execute(line)
+                    writer.write((reply + "\n").encode("utf-8"))
+                    if not valid:
+                        await writer.drain()
+                        break
+                # Replies are only awaited when the client stops reading, so pipelined
+                # commands are not slowed down by a round trip each
+                if writer.transport.get_write_buffer_size() > MAX_LINE:
+                    await writer.drain()
+        except (asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass
+
+    def execute(self, line):
+        return self._execute(line)[0]
+
+    def _execute(self, line):
+        # Returns (reply, valid); valid is False when the line did not parse as commands
+        if line.startswith(("{", "[")):
+            try:
+                message = json.loads(line)
+                if isinstance(message, dict) and message.get("op") == "batch":
+                    message = message.get("commands")
+                commands = message if isinstance(message, list) else [message]
+                parsed = [self._parse_json(command) for command in commands]
+            except (ValueError, CommandError) as e:
+                return json.dumps({"ok": False, "error": str(e)}), False
+            return json.dumps(self._apply(parsed)), True
+        try:
+            result = self._apply([self._parse_text(part) for part in line.split(";") if part.strip()])
+        except CommandError as e:
+            return f"error {e}", False
+        if not result["ok"]:
+            return f"error {result['error']}", True
+        if "counts" in result:
+            return " ".join(str(count) for count in result["counts"]), True
+        return "ok", True
+
+    def _apply(self, parsed):
+        # A line is all-or-nothing: every command is validated before any is queued, and they are
+        # queued together so one frame applies them all
+        steps = []
+        query = None
+        for op, targets, amount in parsed:
+            if op == "get":
+                if any(step[0] == "profile" for step in steps):
+                    return {"ok": False, "error": "get after profile needs a separate line"}
+                query = targets
+            else:
+                steps.extend((op, target, amount) for target in targets)
+        if steps and not self.command_queue.push_many(steps):
+            return {"ok": False, "error": "command queue full"}
+        result = {"ok": True}
+        if query is not None:
+            counts = list(self.counts)
+            for op, target, amount in steps:
+                if op == "add":
+                    counts[target] = min(max(0, counts[target] + amount), MAX_COUNT)
+                elif op == "set":
+                    counts[target] = min(max(0, amount), MAX_COUNT)
+            result["counts"] = [counts[index] for index in query] if query else list(counts)
+        return result
+
+    def _targets(self, counter):
+        # Counter numbers (1-based), "all" or a list of numbers -> list of indices
+        count = len(self.counts)
+        if counter == "all":
+            return list(range(count))
+        numbers = counter if isinstance(counter, list) else [counter]
+        targets = []
+        for number in numbers:
+            try:
+                number = int(number)
+            except (TypeError, ValueError):
+                raise CommandError(f"invalid counter {number!r}")
+            if not 1 <= number <= count:
+                raise CommandError(f"no counter {number}")
+            targets.append(number - 1)
+        return targets
+
+    def _profile(self, name):
+        # Profile name -> [name], or [None] for the next profile
+        if name is None or name == "next":
+            return [None]
+        if name not in self.profiles:
+            raise CommandError(f"no profile {name!r}")
+        return [name]
+
+    def _amount(self, value):
+        try:
+            amount = int(value)
+        except (TypeError, ValueError):
+            raise CommandError(f"invalid number {value!r}")
+        if not -MAX_COUNT <= amount <= MAX_COUNT:
+            raise CommandError(f"number out of range {value!r}")
+        return amount
+
+    def _parse_text(self, text):
+        words = text.split()
+        name = words[0].lower()
+        if name not in TEXT_COMMANDS:
+            raise CommandError(f"unknown command {words[0]!r}")
+        if name == "get":
+            return "get", self._targets(words[1]) if len(words) > 1 else [], None
+        if name == "profile":
+            return "profile", self._profile(text.split(None, 1)[1].strip() if len(words) > 1 else None), 0
+        if len(words) < 2:
+            raise CommandError(f"{name} needs a counter")
+        targets = self._targets(words[1])
+        if name == "reset":
+            return "set", targets, 0
+        if name == "set":
+            if len(words) < 3:
+                raise CommandError("set needs a value")
+            return "set", targets, self._amount(words[2])
+        amount = self._amount(words[2]) if len(words) > 2 else 1
+        return "add", targets, -amount if name == "dec" else amount
+
+    def _parse_json(self, command):
+        if not isinstance(command, dict):
+            raise CommandError("commands must be objects")
+        op = command.get("op")
+        if op == "batch":
+            raise CommandError("batch cannot be nested")
+        if op == "get":
+            counter = command.get("counter")
+            return "get", self._targets(counter) if counter is not None else [], None
+        if op == "profile":
+            return "profile", self._profile(command.get("name")), 0
+        if op not in ("add", "set", "reset"):
+            raise CommandError(f"unknown op {op!r}")
+        targets = self._targets(command.get("counter"))
+        if op == "reset":
+            return "set", targets, 0
+        if op == "set":
+            return "set", targets, self._amount(command.get("value"))
+        return "add", targets, self._amount(command.get("amount", 1))
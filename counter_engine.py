@@ -0,0 +1,137 @@
+# Headless counter state. Nothing in here imports Tkinter, so the engine can be driven and
+# benchmarked without a display; the UI is just one subscriber.
+
+COUNTER_FIELDS = ("label_text", "count", "font_color", "font_size", "font_family", "include_in_viewer", "rollover")
+ROLLOVER_MODES = ("none", "day", "session")  # When a counter resets itself
+VIEWER_FIELDS = ("bg_color", "bg_image_path", "spacing", "auto_fit")
+# Counts are kept within a signed 64-bit range so the history, shared state and journal can store them
+MAX_COUNT = 2 ** 62
+
+COUNTER_DEFAULTS = {
+    "label_text": "Count:",
+    "count": 0,
+    "font_color": "#000000",
+    "font_size": 12,
+    "font_family": "Arial",
+    "include_in_viewer": True,
+    "rollover": "none",
+}
+VIEWER_DEFAULTS = {
+    "bg_color": "#ffffff",
+    "bg_image_path": "",
+    "spacing": 10,
+    "auto_fit": False,  # Size all viewer labels to the largest font that fits the canvas
+}
+
+
+class Counter:
+    __slots__ = COUNTER_FIELDS
+
+    def __init__(self, **fields):
+        for name in COUNTER_FIELDS:
+            setattr(self, name, fields.get(name, COUNTER_DEFAULTS[name]))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in COUNTER_FIELDS}
+
+
+class CounterEngine:
+    # Subscribers are called as callback(index, fields) after every change, where fields is a
+    # tuple of changed field names and index is None for viewer-wide settings.
+    def __init__(self):
+        self.counters = []
+        self.viewer = dict(VIEWER_DEFAULTS)
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, index, fields):
+        for callback in self._subscribers:
+            callback(index, fields)
+
+    def add_counter(self, **fields):
+        self.counters.append(Counter(**fields))
+        index = len(self.counters) - 1
+        self._notify(index, COUNTER_FIELDS)
+        return index
+
+    def remove_counter(self):
+        # Only the last counter can be removed so the indices of the others stay stable
+        if self.counters:
+            self.counters.pop()
+            self._notify(len(self.counters), ())
+
+    def set_count(self, index, value):
+        value = min(max(0, int(value)), MAX_COUNT)
+        counter = self.counters[index]
+        if counter.count != value:
+            counter.count = value
+            self._notify(index, ("count",))
+
+    def increment(self, index, amount=1):
+        self.set_count(index, self.counters[index].count + amount)
+
+    def decrement(self, index, amount=1):
+        self.set_count(index, self.counters[index].count - amount)
+
+    def reset(self, index):
+        self.set_count(index, 0)
+
+    def set_counter(self, index, **fields):
+        counter = self.counters[index]
+        changed = []
+        for name, value in fields.items():
+            if name == "count":
+                value = min(max(0, int(value)), MAX_COUNT)
+            if getattr(counter, name) != value:
+                setattr(counter, name, value)
+                changed.append(name)
+        if changed:
+            self._notify(index, tuple(changed))
+
+    def set_viewer(self, **fields):
+        changed = []
+        for name, value in fields.items():
+            if name not in VIEWER_FIELDS:
+                raise KeyError(name)
+            if self.viewer[name] != value:
+                self.viewer[name] = value
+                changed.append(name)
+        if changed:
+            self._notify(None, tuple(changed))
+
+    def apply_dict(self, data):
+        # Like load_dict, but existing counters are updated in place, so subscribers only see the
+        # fields that differ and counters are only added or removed to match the new number
+        self.set_viewer(**{name: value for name, value in data.get("viewer", {}).items() if name in VIEWER_FIELDS})
+        counters = data.get("counters", [])
+        while len(self.counters) > len(counters):
+            self.remove_counter()
+        for index, fields in enumerate(counters):
+            fields = {name: value for name, value in fields.items() if name in COUNTER_FIELDS}
+            if index < len(self.counters):
+                self.set_counter(index, **dict(COUNTER_DEFAULTS, **fields))
+            else:
+                self.add_counter(**fields)
+
+    def counts(self):
+        return [counter.count for counter in self.counters]
+
+    def to_dict(self):
+        return {
+            "counters": [counter.to_dict() for counter in self.counters],
+            "viewer": dict(self.viewer),
+        }
+
+    def load_dict(self, data):
+        # Replace all state, e.g. from saved settings; subscribers see every counter change
+        while self.counters:
+            self.remove_counter()
+        self.set_viewer(**{name: value for name, value in data.get("viewer", {}).items() if name in VIEWER_FIELDS})
+        for fields in data.get("counters", []):
+            self.add_counter(**{name: value for name, value in fields.items() if name in COUNTER_FIELDS})
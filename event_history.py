@@ -0,0 +1,118 @@
+# Timestamped history of counter changes for rolling-rate queries ("deaths in the last 10 minutes").
+# Each counter keeps two parallel arrays: event timestamps and the running total of deltas up to and
+# including that event, so the sum over any window is one binary search and a subtraction.
+# Counters are keyed by (profile name, counter index), so every profile keeps its own history.
+from array import array
+from bisect import bisect_left
+import os
+import struct
+import time
+
+HISTORY_MAGIC = b"SCH2"
+LEGACY_MAGIC = b"SCH1"  # Keyed by counter index alone, from before profiles
+
+
+class CounterSeries:
+    __slots__ = ("times", "totals", "base")
+
+    def __init__(self):
+        self.times = array("d")
+        self.totals = array("q")
+        self.base = 0  # Running total of events trimmed off the front
+
+    def total_before(self, index):
+        return self.totals[index - 1] if index > 0 else self.base
+
+
+class EventHistory:
+    def __init__(self, max_age=7 * 24 * 3600):
+        self.max_age = max_age
+        self._series = {}
+
+    def record(self, counter, delta, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        series = self._series.get(counter)
+        if series is None:
+            series = self._series[counter] = CounterSeries()
+        if series.times and timestamp < series.times[-1]:
+            timestamp = series.times[-1]  # Keep the series sorted if the wall clock steps back
+        series.times.append(timestamp)
+        series.totals.append((series.totals[-1] if series.totals else series.base) + delta)
+
+    def total_since(self, counter, since):
+        # Net change of a counter from `since` until now, O(log n)
+        series = self._series.get(counter)
+        if series is None or not series.times:
+            return 0
+        return series.totals[-1] - series.total_before(bisect_left(series.times, since))
+
+    def total_between(self, counter, start, end):
+        series = self._series.get(counter)
+        if series is None or not series.times:
+            return 0
+        return (series.total_before(bisect_left(series.times, end)) -
+                series.total_before(bisect_left(series.times, start)))
+
+    def per_hour(self, counter, window, now=None):
+        now = time.time() if now is None else now
+        return self.total_since(counter, now - window) * 3600 / window
+
+    def event_count(self):
+        return sum(len(series.times) for series in self._series.values())
+
+    def forget(self, counter):
+        self._series.pop(counter, None)
+
+    def forget_profile(self, profile):
+        for counter in [counter for counter in self._series if counter[0] == profile]:
+            del self._series[counter]
+
+    def trim(self, now=None):
+        # Drop events older than max_age; the running totals stay valid through `base`
+        cutoff = (time.time() if now is None else now) - self.max_age
+        for series in self._series.values():
+            index = bisect_left(series.times, cutoff)
+            if index:
+                series.base = series.totals[index - 1]
+                del series.times[:index]
+                del series.totals[:index]
+
+    def save(self, path):
+        self.trim()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HISTORY_MAGIC + struct.pack("<I", len(self._series)))
+            for (profile, index), series in self._series.items():
+                name = profile.encode("utf-8")
+                f.write(struct.pack("<H", len(name)) + name)
+                f.write(struct.pack("<IQq", index, len(series.times), series.base))
+                series.times.tofile(f)
+                series.totals.tofile(f)
+        os.replace(temp_path, path)
+
+    def load(self, path, legacy_profile=""):
+        # A file from before profiles is taken to be the history of legacy_profile
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "rb") as f:
+                magic = f.read(4)
+                if magic not in (HISTORY_MAGIC, LEGACY_MAGIC):
+                    return
+                (count,) = struct.unpack("<I", f.read(4))
+                series_by_counter = {}
+                for _ in range(count):
+                    profile = legacy_profile
+                    if magic == HISTORY_MAGIC:
+                        (name_length,) = struct.unpack("<H", f.read(2))
+                        profile = f.read(name_length).decode("utf-8")
+                    index, length, base = struct.unpack("<IQq", f.read(20))
+                    series = CounterSeries()
+                    series.base = base
+                    series.times.fromfile(f, length)
+                    series.totals.fromfile(f, length)
+                    series_by_counter[(profile, index)] = series
+        except (OSError, EOFError, struct.error, UnicodeDecodeError):
+            return  # A damaged history file only costs the rolling rates, never the counts
+        self._series = series_by_counter
+        self.trim()
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+import sys
+from tkinter import font
+from journal import write_atomic
+
+
+def font_directories():
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        local = os.environ.get("LOCALAPPDATA", os.path.join(home, "AppData", "Local"))
+        return [os.path.join(windir, "Fonts"), os.path.join(local, "Microsoft", "Windows", "Fonts")]
+    if sys.platform == "darwin":
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    return ["/usr/share/fonts", "/usr/local/share/fonts", os.path.join(home, ".fonts"),
+            os.path.join(home, ".local", "share", "fonts")]
+
+
+def directories_fingerprint():
+    # Installing or removing a font changes the modification time of the directory it lands in, which
+    # on Linux is usually a package subdirectory (/usr/share/fonts/truetype/<package>), so every
+    # directory under the font roots is part of the fingerprint. Only directories are stat'ed.
+    digest = hashlib.sha1()
+    for root_directory in font_directories():
+        for directory, _, _ in os.walk(root_directory):
+            try:
+                digest.update(f"{directory}\0{os.stat(directory).st_mtime_ns}\0".encode("utf-8", "replace"))
+            except OSError:
+                continue
+    return digest.hexdigest()
+
+
+def cache_key(root):
+    return [sys.platform, root.tk.call("info", "patchlevel"), directories_fingerprint()]
+
+
+def load_font_families(root, cache_path):
+    # Font enumeration is slow with thousands of fonts installed, so the sorted list is cached on disk
+    key = cache_key(root)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached["families"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    families = sorted(set(font.families(root)))
+    try:
+        write_atomic(cache_path, json.dumps({"key": key, "families": families}), fsync=False)
+    except OSError:
+        pass
+    return families
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import tkinter.font as tkfont
+
+# Digits are measured as "0": UI fonts use equal-width (tabular) digits, so "Deaths: 1000" and
+# "Deaths: 1234" share one measurement and counting up never needs a new one
+DIGIT_SHAPE = str.maketrans("123456789", "000000000")
+MIN_FIT_SIZE = 6
+MAX_FIT_SIZE = 200
+LABEL_PADDING = 8  # Border, highlight and padx around a tk.Label's text, both sides together
+
+
+def text_shape(text):
+    return text.translate(DIGIT_SHAPE)
+
+
+class FontMetricCache:
+    # Measured text widths per (family, size, text shape) and line heights per (family, size), so
+    # fitting text is a dictionary lookup once a shape has been seen
+    def __init__(self, root, max_entries=4096):
+        self.root = root
+        self.max_entries = max_entries
+        self._fonts = {}
+        self._heights = {}
+        self._widths = OrderedDict()
+        self._fits = OrderedDict()
+
+    def _font(self, family, size):
+        font = self._fonts.get((family, size))
+        if font is None:
+            font = self._fonts[(family, size)] = tkfont.Font(self.root, family=family, size=size)
+        return font
+
+    def height(self, family, size):
+        height = self._heights.get((family, size))
+        if height is None:
+            height = self._heights[(family, size)] = self._font(family, size).metrics("linespace")
+        return height
+
+    def width(self, family, size, shape):
+        key = (family, size, shape)
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = self._font(family, size).measure(shape)
+            if len(self._widths) > self.max_entries:
+                self._widths.popitem(last=False)
+        return width
+
+    def fit(self, lines, width, height, spacing):
+        # Largest size at which every (family, text) line fits side by side within width and stacked
+        # (with spacing above and below each, as the viewer packs them) within height
+        key = (tuple((family, text_shape(text)) for family, text in lines), width, height, spacing)
+        size = self._fits.get(key)
+        if size is not None:
+            self._fits.move_to_end(key)
+            return size
+
+        low, high = MIN_FIT_SIZE, MAX_FIT_SIZE
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._fits_at(key[0], middle, width, height, spacing):
+                low = middle
+            else:
+                high = middle - 1
+        self._fits[key] = low
+        if len(self._fits) > self.max_entries:
+            self._fits.popitem(last=False)
+        return low
+
+    def _fits_at(self, shapes, size, width, height, spacing):
+        total_height = 0
+        for family, shape in shapes:
+            if self.width(family, size, shape) + LABEL_PADDING > width:
+                return False
+            total_height += self.height(family, size) + LABEL_PADDING + 2 * spacing
+        return total_height <= height
@@ -0,0 +1,230 @@
+# Replays hotkey traces through the app's dispatch path with no keyboard or display: a thread feeds
+# the events to the KeyListener callbacks as pynput would, the HotkeyTable resolves them, commands
+# go through the CommandQueue, and a 16 ms frame loop folds them into a CounterEngine as the UI does.
+# The result is checked against an independent model of what the trace should have done.
+#
+#   python hotkey_replay.py keys.trace                     # recorded with StreamCounter --record-keys
+#   python hotkey_replay.py keys.trace --speed 10          # ten times faster than it was recorded
+#   python hotkey_replay.py --synthetic 50000 --rate 5000 --repeat-fraction 0.2 --speed 1
+#
+# A JSON report goes to stdout (and --output); the exit status is 1 if any action was missed or
+# duplicated, the final counts differ, or the replay ran below --min-rate events per second.
+import argparse
+from collections import Counter as Tally, deque
+from itertools import combinations
+import json
+import sys
+import threading
+import time
+
+from command_queue import CommandQueue
+from counter_engine import CounterEngine
+from hotkey_trace import load_trace, save_trace, synthetic_trace
+from hotkeys import HotkeyTable, MODIFIER_BITS, MOD_CTRL, MOD_SHIFT, MOD_ALT, counter_commands, modifier_mask
+from instrumentation import Histogram
+from key_listener import KeyListener
+
+FRAME_INTERVAL = 0.016
+
+
+def compile_bindings(serialized):
+    # Saved hotkeys hold the key's string form already; an empty key is an unbound action
+    return {action: dict(hotkey, key=hotkey["key"] or None) for action, hotkey in serialized.items()}
+
+
+def expected_actions(header, events, stale_after):
+    # What the trace should dispatch: a bound key fires when pressed with exactly its modifiers
+    # held, and under the "ignore" policy a press of a key that is already held (auto-repeat) does
+    # not fire unless the key has gone stale. When the held modifiers give no binding, the fewest
+    # modifiers with no events for stale_after (missed key-ups) are dropped that give one.
+    bindings = {}
+    for action, hotkey in compile_bindings(header["hotkeys"]).items():
+        if hotkey["key"] is not None:
+            bindings[(modifier_mask(hotkey), hotkey["key"])] = action
+    repeat = header.get("repeat_policy") == "repeat"
+    held = {}
+    actions = []
+    for t, event, key in events:
+        if event == "release":
+            held.pop(key, None)
+            continue
+        last = held.get(key)
+        held[key] = t
+        if key in MODIFIER_BITS:
+            continue
+        if last is not None and t - last < stale_after and not repeat:
+            continue
+        mods = 0
+        for name in held:
+            mods |= MODIFIER_BITS.get(name, 0)
+        action = bindings.get((mods, key))
+        if action is None:
+            fresh = 0
+            for name, at in held.items():
+                if t - at < stale_after:
+                    fresh |= MODIFIER_BITS.get(name, 0)
+            droppable = [bit for bit in (MOD_CTRL, MOD_SHIFT, MOD_ALT) if mods & bit and not fresh & bit]
+            for size in range(1, len(droppable) + 1):
+                for bits in combinations(droppable, size):
+                    drop = sum(bits)
+                    action = bindings.get((mods & ~drop, key))
+                    if action is not None:
+                        for name in [name for name in held if MODIFIER_BITS.get(name, 0) & drop]:
+                            del held[name]
+                        break
+                if action is not None:
+                    break
+        if action is not None:
+            actions.append(action)
+    return actions
+
+
+def expected_counts(header, actions):
+    counts = list(header["counts"])
+    commands = counter_commands(len(counts))
+    for action in actions:
+        command = commands.get(action)
+        if command is None:
+            continue
+        op, index, amount = command
+        counts[index] = max(0, counts[index] + amount if op == "add" else amount)
+    return counts
+
+
+def replay(header, events, speed=1.0, queue_size=10000, stale_after=2.0):
+    engine = CounterEngine()
+    for count in header["counts"]:
+        engine.add_counter(count=count)
+    commands = counter_commands(len(engine.counters))
+
+    # The table reads the trace's clock so stale-key handling behaves as it did when recorded,
+    # whatever the replay speed
+    trace_time = [0.0]
+    table = HotkeyTable(header.get("repeat_policy", "ignore"), stale_after, clock=lambda: trace_time[0])
+    table.compile(compile_bindings(header["hotkeys"]))
+    queue = CommandQueue(queue_size)
+    dispatched = Tally()
+    dropped = Tally()
+    pushed_at = deque()
+
+    def dispatch(action):
+        # The app's dispatch_hotkey, with tallies and a timestamp for the latency report. An action
+        # only counts as dispatched once its command is queued; one the full queue refused is missed.
+        command = commands.get(action)
+        if command is None:
+            dispatched[action] += 1
+        elif queue.push(*command):
+            dispatched[action] += 1
+            pushed_at.append(time.perf_counter_ns())
+        else:
+            dropped[action] += 1
+
+    listener = KeyListener(table, dispatch)
+    finished = threading.Event()
+    feed_time = [0.0]
+
+    def feed():
+        started = time.perf_counter()
+        for t, event, key in events:
+            if speed:
+                delay = t / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            trace_time[0] = t
+            if event == "press":
+                listener.on_press(key)
+            else:
+                listener.on_release(key)
+        feed_time[0] = time.perf_counter() - started
+        finished.set()
+
+    latency = Histogram()
+    frames = 0
+
+    def run_frame():
+        now = time.perf_counter_ns()
+        for _ in range(len(pushed_at)):
+            latency.record(now - pushed_at.popleft())
+        batch = queue.drain()
+        if batch:
+            values = queue.fold(batch, lambda index: engine.counters[index].count)
+            for index, value in values.items():
+                engine.set_count(index, value)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    while not finished.wait(FRAME_INTERVAL):
+        run_frame()
+        frames += 1
+    run_frame()
+    frames += 1
+
+    actions = expected_actions(header, events, stale_after)
+    expected = Tally(actions)
+    missed = {action: expected[action] - dispatched[action]
+              for action in expected if expected[action] > dispatched[action]}
+    duplicated = {action: dispatched[action] - expected[action]
+                  for action in dispatched if dispatched[action] > expected[action]}
+    final_counts = engine.counts()
+    want_counts = expected_counts(header, actions)
+    elapsed = feed_time[0]
+    return {
+        "events": len(events),
+        "speed": speed,
+        "elapsed_s": round(elapsed, 4),
+        "events_per_second": round(len(events) / elapsed) if elapsed else None,
+        "actions_per_second": round(sum(dispatched.values()) / elapsed) if elapsed else None,
+        "frames": frames,
+        "expected_actions": dict(expected),
+        "dispatched_actions": dict(dispatched),
+        "dropped_actions": dict(dropped),
+        "missed": missed,
+        "duplicated": duplicated,
+        "final_counts": final_counts,
+        "expected_counts": want_counts,
+        "counts_match": final_counts == want_counts,
+        "queue": {"pushed": queue.pushed, "dropped": queue.dropped, "coalesced": queue.coalesced,
+                  "max_depth": queue.max_depth},
+        "dispatch_to_frame_us": latency.to_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay hotkey traces through Stream Counter's dispatch logic")
+    parser.add_argument("trace", nargs="?", help="trace file recorded with StreamCounter.py --record-keys")
+    parser.add_argument("--synthetic", type=int, metavar="EVENTS", help="replay a generated trace of this many events")
+    parser.add_argument("--rate", type=float, default=2000, help="events per second in the generated trace")
+    parser.add_argument("--counters", type=int, default=2, help="counters in the generated trace")
+    parser.add_argument("--repeat-fraction", type=float, default=0.0,
+                        help="fraction of generated taps that include OS auto-repeat presses")
+    parser.add_argument("--seed", type=int, help="random seed for the generated trace")
+    parser.add_argument("--save", help="also write the generated trace to this file")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed relative to the trace's timestamps (0 = as fast as possible)")
+    parser.add_argument("--queue-size", type=int, default=10000, help="command queue capacity")
+    parser.add_argument("--min-rate", type=float, default=0,
+                        help="fail if fewer events per second than this were replayed")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        header, events = synthetic_trace(args.synthetic, args.rate, args.counters, args.repeat_fraction, args.seed)
+        if args.save:
+            save_trace(args.save, header, events)
+    elif args.trace:
+        header, events = load_trace(args.trace)
+    else:
+        parser.error("give a trace file or --synthetic EVENTS")
+
+    report = replay(header, events, args.speed, args.queue_size)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    ok = (not report["missed"] and not report["duplicated"] and report["counts_match"] and
+          (report["events_per_second"] or 0) >= args.min_rate)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Hotkey traces: the key events the global hook received, with timestamps, one JSON object per line.
+# The first line is a header with the bindings, repeat policy and counts in force when recording
+# started, so a replay (see hotkey_replay.py) dispatches against exactly what the app had:
+#
+#   {"trace": 1, "hotkeys": {...}, "repeat_policy": "ignore", "counts": [0, 3]}
+#   {"t": 0.0, "e": "press", "k": "Key.ctrl_l"}
+#   {"t": 0.084113, "e": "release", "k": "Key.ctrl_l"}
+#
+# Keys are kept in their pynput string form, which is what the HotkeyTable compares, so replaying a
+# trace needs neither pynput nor a keyboard.
+import json
+import random
+import time
+
+from hotkeys import HOTKEY_OPS, hotkey_action, normalize_key
+
+TRACE_VERSION = 1
+EVENTS = ("press", "release")
+SYNTHETIC_MODIFIERS = ("Key.ctrl_l", "Key.shift_l")
+SYNTHETIC_WEIGHTS = {"increment": 6, "decrement": 3, "reset": 1}
+
+
+class TraceWriter:
+    # record() runs on the listener thread for every event. Lines collect in the file's buffer and
+    # reach the disk in blocks, so recording costs a string format per key.
+    def __init__(self, path, hotkeys, repeat_policy, counts, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.events = 0
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"trace": TRACE_VERSION, "hotkeys": hotkeys,
+                                     "repeat_policy": repeat_policy, "counts": list(counts)}) + "\n")
+        self._started = clock()
+
+    def record(self, event, key):
+        self._file.write(f'{{"t": {self.clock() - self._started:.6f}, "e": "{event}", '
+                         f'"k": {json.dumps(normalize_key(key))}}}\n')
+        self.events += 1
+
+    def close(self):
+        self._file.close()
+
+
+def load_trace(path):
+    # Returns (header, [(t, event, key), ...])
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("trace") != TRACE_VERSION:
+            raise ValueError(f"{path} is not a hotkey trace")
+        events = []
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                events.append((event["t"], event["e"], event["k"]))
+    return header, events
+
+
+def save_trace(path, header, events):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for t, event, key in events:
+            f.write(json.dumps({"t": round(t, 6), "e": event, "k": key}) + "\n")
+
+
+def synthetic_hotkeys(counters):
+    # Ctrl+Shift+F1, F2, F3 for the first counter's increment, decrement and reset, F4-F6 for the
+    # second and so on, as the app's defaults begin
+    hotkeys = {}
+    for index in range(counters):
+        for position, op in enumerate(HOTKEY_OPS):
+            hotkeys[hotkey_action(index, op)] = {"ctrl": True, "shift": True, "alt": False,
+                                                 "key": f"Key.f{index * len(HOTKEY_OPS) + position + 1}"}
+    return hotkeys
+
+
+def synthetic_trace(events, rate, counters=2, repeat_fraction=0.0, seed=None):
+    # Hotkey taps with Ctrl+Shift held throughout, evenly spaced at rate events per second.
+    # repeat_fraction of the taps get one to three OS auto-repeat presses before their release.
+    # The trace has exactly `events` events (at least six: the modifiers' presses and releases and
+    # one tap).
+    generator = random.Random(seed)
+    hotkeys = synthetic_hotkeys(counters)
+    actions = list(hotkeys)
+    weights = [SYNTHETIC_WEIGHTS[action.rpartition("_")[2]] for action in actions]
+    step = 1.0 / rate
+    trace = [(0.0, "press", key) for key in SYNTHETIC_MODIFIERS]
+    taps_end = max(events, 2 * len(SYNTHETIC_MODIFIERS) + 2) - len(SYNTHETIC_MODIFIERS)
+    while len(trace) < taps_end:
+        key = hotkeys[generator.choices(actions, weights)[0]]["key"]
+        presses = 1 + (generator.randint(1, 3) if generator.random() < repeat_fraction else 0)
+        # Fit the last tap to the events left, with an extra repeat press rather than a gap of one
+        remaining = taps_end - len(trace)
+        presses = min(presses, remaining - 1)
+        if remaining - presses - 1 == 1:
+            presses += 1
+        for _ in range(presses):
+            trace.append((len(trace) * step, "press", key))
+        trace.append((len(trace) * step, "release", key))
+    trace.extend((len(trace) * step, "release", key) for key in reversed(SYNTHETIC_MODIFIERS))
+    header = {"trace": TRACE_VERSION, "hotkeys": hotkeys, "repeat_policy": "ignore", "counts": [0] * counters}
+    return header, trace
@@ -0,0 +1,120 @@
+import time
+
+MOD_CTRL = 1
+MOD_SHIFT = 2
+MOD_ALT = 4
+
+# Modifier keys by their pynput names (left/right variants collapse onto one bit)
+MODIFIER_BITS = {
+    "Key.ctrl": MOD_CTRL, "Key.ctrl_l": MOD_CTRL, "Key.ctrl_r": MOD_CTRL,
+    "Key.shift": MOD_SHIFT, "Key.shift_l": MOD_SHIFT, "Key.shift_r": MOD_SHIFT,
+    "Key.alt": MOD_ALT, "Key.alt_l": MOD_ALT, "Key.alt_r": MOD_ALT, "Key.alt_gr": MOD_ALT,
+}
+
+# Repeat policies: "ignore" fires once per physical press, "repeat" also fires on OS auto-repeat
+REPEAT_POLICIES = ("ignore", "repeat")
+
+HOTKEY_OPS = ("increment", "decrement", "reset")
+
+
+def hotkey_action(index, op):
+    return f"counter{index + 1}_{op}"
+
+
+def counter_commands(counter_count):
+    # The CommandQueue command behind each counter hotkey action
+    commands = {}
+    for index in range(counter_count):
+        commands[hotkey_action(index, "increment")] = ("add", index, 1)
+        commands[hotkey_action(index, "decrement")] = ("add", index, -1)
+        commands[hotkey_action(index, "reset")] = ("set", index, 0)
+    return commands
+
+
+def normalize_key(key):
+    # Keys are compared by their pynput string form, which is also how they are saved in the settings
+    return key if isinstance(key, str) else str(key)
+
+
+def modifier_mask(hotkey):
+    return ((MOD_CTRL if hotkey.get("ctrl", False) else 0) |
+            (MOD_SHIFT if hotkey.get("shift", False) else 0) |
+            (MOD_ALT if hotkey.get("alt", False) else 0))
+
+
+class HotkeyTable:
+    # Hotkeys compiled into a (modifier mask, key) -> action lookup with edge-triggered presses
+    def __init__(self, repeat_policy="ignore", stale_after=2.0, clock=time.monotonic):
+        self.repeat_policy = repeat_policy if repeat_policy in REPEAT_POLICIES else "ignore"
+        # A held key with no events for this many seconds is treated as released (missed key-up)
+        self.stale_after = stale_after
+        self.clock = clock  # Replays substitute the trace's own timestamps
+        self._table = {}
+        self._held = {}
+        self._mods = 0
+
+    def compile(self, hotkeys):
+        table = {}
+        for action, hotkey in hotkeys.items():
+            if hotkey.get("key") is None:
+                continue
+            table[(modifier_mask(hotkey), normalize_key(hotkey["key"]))] = action
+        # Swapped in one assignment so the listener thread never sees a half-built table
+        self._table = table
+
+    def press(self, key):
+        name = normalize_key(key)
+        now = self.clock()
+        last = self._held.get(name)
+        self._held[name] = now
+        bit = MODIFIER_BITS.get(name)
+        if bit is not None:
+            self._mods |= bit
+            return None
+        if last is not None and now - last < self.stale_after and self.repeat_policy == "ignore":
+            return None
+        action = self._table.get((self._mods, name))
+        if action is None and self._mods:
+            action = self._press_without_stale_modifiers(name, now)
+        return action
+
+    def _press_without_stale_modifiers(self, name, now):
+        # A modifier whose key-up was missed (released during alt-tab or a UAC prompt) would block
+        # every binding. Modifiers held with no events for stale_after (which also describes ones
+        # really held down, as they stop repeating once another key is pressed) are only trusted
+        # while the full combination has a binding. Otherwise the fewest of them are dropped that
+        # give a binding, and those are forgotten.
+        fresh = 0
+        stale = 0
+        for held, at in self._held.items():
+            bit = MODIFIER_BITS.get(held, 0)
+            if now - at >= self.stale_after:
+                stale |= bit
+            else:
+                fresh |= bit
+        droppable = stale & ~fresh
+        for drop in sorted(range(1, droppable + 1), key=lambda mask: bin(mask).count("1")):
+            if drop & ~droppable:
+                continue
+            action = self._table.get((self._mods & ~drop, name))
+            if action is not None:
+                for held in [held for held in self._held if MODIFIER_BITS.get(held, 0) & drop]:
+                    del self._held[held]
+                self._mods &= ~drop
+                return action
+        return None
+
+    def release(self, key):
+        name = normalize_key(key)
+        if self._held.pop(name, None) is not None and name in MODIFIER_BITS:
+            mods = 0
+            for held in self._held:
+                mods |= MODIFIER_BITS.get(held, 0)
+            self._mods = mods
+
+    def modifiers(self):
+        return self._mods
+
+    def reset(self):
+        self._held.clear()
+        self._mods = 0
@@ -0,0 +1,140 @@
+# Always-on latency and throughput counters for the hotkey pipeline. Recording is a timestamp and a
+# few integer operations so it can stay enabled while streaming.
+from collections import deque
+import json
+import time
+
+HISTOGRAM_BUCKETS = 25  # Bucket i counts samples below 2**i microseconds (the last one is open-ended)
+STAGES = ("key_to_dispatch", "key_to_render", "key_to_idle", "frame")
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "sum_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def record(self, elapsed_ns):
+        us = elapsed_ns // 1000
+        bucket = us.bit_length()
+        self.counts[bucket if bucket < HISTOGRAM_BUCKETS else HISTOGRAM_BUCKETS - 1] += 1
+        self.total += 1
+        self.sum_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the requested sample
+        if not self.total:
+            return 0
+        target = fraction * self.total
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(2 ** bucket, self.max_us)
+        return self.max_us
+
+    def to_dict(self):
+        return {
+            "count": self.total,
+            "mean_us": round(self.sum_us / self.total, 1) if self.total else 0,
+            "p50_us": self.percentile(0.50),
+            "p90_us": self.percentile(0.90),
+            "p99_us": self.percentile(0.99),
+            "max_us": self.max_us,
+            "buckets_us": {f"<{2 ** bucket}": count for bucket, count in enumerate(self.counts) if count},
+        }
+
+
+class RateCounter:
+    # Events per second over a sliding window of one-second slots
+    def __init__(self, window=10):
+        self.window = window
+        self.counts = [0] * window
+        self.seconds = [0] * window
+
+    def add(self, count=1):
+        second = int(time.monotonic())
+        slot = second % self.window
+        if self.seconds[slot] != second:
+            self.seconds[slot] = second
+            self.counts[slot] = 0
+        self.counts[slot] += count
+
+    def rate(self):
+        now = int(time.monotonic())
+        total = sum(count for count, second in zip(self.counts, self.seconds) if now - second < self.window)
+        return round(total / self.window, 2)
+
+
+class Instrumentation:
+    def __init__(self, root):
+        self.root = root
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.rates = {"keys": RateCounter(), "frames": RateCounter(), "renders": RateCounter()}
+        self._received = deque()
+        self._in_flight = []
+        self._idle_pending = False
+
+    def key_received(self):
+        # Listener thread: deque.append is atomic, so no lock is needed
+        self._received.append(time.perf_counter_ns())
+
+    def frame_started(self):
+        now = time.perf_counter_ns()
+        if self._received:
+            dispatch = self.histograms["key_to_dispatch"]
+            while self._received:
+                received = self._received.popleft()
+                dispatch.record(now - received)
+                self._in_flight.append(received)
+            self.rates["keys"].add(len(self._in_flight))
+        return now
+
+    def render_finished(self):
+        now = time.perf_counter_ns()
+        self.rates["renders"].add()
+        if self._in_flight:
+            render = self.histograms["key_to_render"]
+            for received in self._in_flight:
+                render.record(now - received)
+            if not self._idle_pending:
+                self._idle_pending = True
+                self.root.after_idle(self._idle_reached)
+
+    def frame_finished(self, started):
+        self.histograms["frame"].record(time.perf_counter_ns() - started)
+        self.rates["frames"].add()
+        if self._in_flight and not self._idle_pending:
+            # The keys changed nothing visible (e.g. decrementing at zero), so there is no paint to wait for
+            self._in_flight = []
+
+    def _idle_reached(self):
+        # The first idle pass after a render is when Tk has drawn it
+        now = time.perf_counter_ns()
+        idle = self.histograms["key_to_idle"]
+        for received in self._in_flight:
+            idle.record(now - received)
+        self._in_flight = []
+        self._idle_pending = False
+
+    def reset(self):
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.rates = {name: RateCounter() for name in self.rates}
+
+    def snapshot(self):
+        return {
+            "stages": {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+            "per_second": {name: counter.rate() for name, counter in self.rates.items()},
+        }
+
+    def dump(self, path, extra=None):
+        data = self.snapshot()
+        if extra:
+            data.update(extra)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+
+def write_atomic(path, data, fsync=True):
+    # Write to a temp file next to the target, then rename over it so readers never see a partial file
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class CounterJournal:
+    # Append-only JSONL log of counter values. Each line holds the new value of one counter,
+    # so replaying is idempotent and the last line for a counter wins.
+    def __init__(self, path, fsync_interval=1.0, compact_after=1000):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        self.entries = 0
+        self.last_timestamp = 0  # Wall-clock time of the newest replayed entry
+        self._file = None
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def replay(self):
+        values = {}
+        if not os.path.exists(self.path):
+            return values
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    values[entry["c"]] = entry["v"]
+                    self.last_timestamp = max(self.last_timestamp, entry.get("t", 0))
+                except (ValueError, KeyError, TypeError):
+                    # A crash mid-write can leave a truncated last line
+                    continue
+                self.entries += 1
+        return values
+
+    def record(self, counter, value):
+        if self._file is None:
+            self._file = open(self.path, "a")
+            if self._file.tell() > 0:
+                # Terminate a line left truncated by a crash so the next entry stays readable
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._file.write("\n")
+        self._file.write(json.dumps({"c": counter, "v": value, "t": round(time.time(), 3)}) + "\n")
+        self.entries += 1
+        self._dirty = True
+
+    def sync(self, force=False):
+        # Called every frame; the fsync itself is batched to once per fsync_interval
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if force or now - self._last_sync >= self.fsync_interval:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self._last_sync = now
+
+    def needs_compaction(self):
+        return self.entries >= self.compact_after
+
+    def clear(self):
+        # Call after an atomic snapshot has been written; the journal only needs what came after it
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entries = 0
+        self._dirty = False
+
+    def close(self):
+        if self._file is not None:
+            self.sync(force=True)
+            self._file.close()
+            self._file = None
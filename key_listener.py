@@ -0,0 +1,82 @@
+from collections import deque
+
+from hotkeys import MODIFIER_BITS, MOD_CTRL, MOD_SHIFT, MOD_ALT, normalize_key
+
+
+class KeyListener:
+    # The one global keyboard hook. Every event runs on the pynput thread, which owns all key state
+    # (through the HotkeyTable) and switches between two modes:
+    #   dispatch - hotkey presses are passed to on_action
+    #   record   - the next non-modifier key, with the modifiers held at the time, becomes a hotkey
+    # The Tk thread starts a recording by setting one attribute and collects the outcome from a
+    # deque with poll(), so neither side ever takes a lock.
+    def __init__(self, table, on_action, trace=None):
+        self.table = table
+        self.on_action = on_action
+        self.trace = trace  # Optional TraceWriter that records every event as pynput delivers it
+        self.recording = None  # Action being recorded; set by the Tk thread, cleared by the listener
+        self.results = deque()  # ("recorded", action, hotkey) or ("cancelled", action, None)
+        self._listener = None
+        self._recording_for = None
+        self._candidate = None
+
+    def start(self):
+        # Imported here so the dispatch logic can be driven without a keyboard hook (see hotkey_replay.py)
+        from pynput import keyboard
+        self._listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
+        self._listener.daemon = True
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def record(self, action):
+        self.recording = action
+
+    def poll(self):
+        results = []
+        for _ in range(len(self.results)):
+            results.append(self.results.popleft())
+        return results
+
+    def on_press(self, key):
+        if self.trace:
+            self.trace.record("press", key)
+        # The table sees every event in both modes so held keys and modifiers never go stale
+        action = self.table.press(key)
+        recording = self.recording
+        if recording is None:
+            if action is not None:
+                self.on_action(action)
+            return
+        if recording != self._recording_for:
+            self._recording_for = recording
+            self._candidate = None
+        name = normalize_key(key)
+        if name == "Key.esc":
+            self._finish("cancelled", None)
+        elif name not in MODIFIER_BITS and not hasattr(key, "char"):
+            self._candidate = (key, self.table.modifiers())
+
+    def on_release(self, key):
+        if self.trace:
+            self.trace.record("release", key)
+        self.table.release(key)
+        if self.recording is None or self._candidate is None or self.recording != self._recording_for:
+            return
+        main_key, mods = self._candidate
+        if normalize_key(key) == normalize_key(main_key):
+            self._finish("recorded", {
+                "ctrl": bool(mods & MOD_CTRL),
+                "shift": bool(mods & MOD_SHIFT),
+                "alt": bool(mods & MOD_ALT),
+                "key": main_key,
+            })
+
+    def _finish(self, outcome, hotkey):
+        self.results.append((outcome, self._recording_for, hotkey))
+        self._recording_for = None
+        self._candidate = None
+        self.recording = None
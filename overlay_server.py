@@ -0,0 +1,232 @@
+# Local HTTP + WebSocket server for OBS browser sources. Runs its own asyncio loop on a daemon
+# thread; the Tk thread hands it state with publish() and only changed values are pushed.
+import asyncio
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import struct
+
+from threaded_server import ThreadedServer
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_CLIENT_BUFFER = 256 * 1024  # Clients that fall this far behind are disconnected
+MAX_CLIENT_FRAME = 64 * 1024
+
+OVERLAY_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Stream Counter Overlay</title>
+<style>
+  html, body { margin: 0; height: 100%; overflow: hidden; }
+  body { display: flex; align-items: center; justify-content: center;
+         background-size: 100% 100%; background-repeat: no-repeat; }
+  #counters { text-align: center; }
+  .counter { white-space: pre; }
+</style>
+</head>
+<body>
+<div id="counters"></div>
+<script>
+const transparent = new URLSearchParams(location.search).has("transparent");
+const container = document.getElementById("counters");
+let viewer = {};
+let counters = [];
+
+function renderViewer() {
+  document.body.style.backgroundColor = transparent ? "transparent" : viewer.bg_color;
+  document.body.style.backgroundImage = !transparent && viewer.bg_image ? `url("${viewer.bg_image}")` : "none";
+  for (let i = 0; i < counters.length; i++) renderCounter(i);
+}
+
+function renderCounter(i) {
+  let element = container.children[i];
+  if (!element) {
+    element = document.createElement("div");
+    element.className = "counter";
+    container.appendChild(element);
+  }
+  const counter = counters[i];
+  element.textContent = `${counter.label_text} ${counter.count}`;
+  element.style.fontFamily = `"${counter.font_family}"`;
+  element.style.fontSize = `${counter.font_size}pt`;
+  element.style.color = counter.font_color;
+  element.style.padding = `${viewer.spacing}px 0`;
+  element.style.display = counter.include_in_viewer ? "" : "none";
+}
+
+function connect() {
+  const socket = new WebSocket(`ws://${location.host}/ws`);
+  socket.onmessage = (event) => {
+    const message = JSON.parse(event.data);
+    if (message.type === "state") {
+      viewer = message.viewer;
+      counters = message.counters;
+      container.replaceChildren();
+      renderViewer();
+      return;
+    }
+    counters.length = Math.min(counters.length, message.length);
+    while (container.children.length > message.length) container.lastChild.remove();
+    for (const [index, fields] of Object.entries(message.counters)) {
+      counters[index] = Object.assign(counters[index] || {}, fields);
+    }
+    if (message.viewer) {
+      Object.assign(viewer, message.viewer);
+      renderViewer();
+    } else {
+      for (const index of Object.keys(message.counters)) renderCounter(Number(index));
+    }
+  };
+  socket.onclose = () => setTimeout(connect, 1000);
+}
+connect();
+</script>
+</body>
+</html>
+"""
+
+
+def encode_frame(payload, opcode=0x1):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_frame(reader):
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_CLIENT_FRAME:
+        raise ConnectionError("WebSocket frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+
+class OverlayServer(ThreadedServer):
+    def __init__(self, host="127.0.0.1", port=8765):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self._clients = set()
+        self._state = {"viewer": {}, "counters": []}
+
+    def client_count(self):
+        return len(self._clients)
+
+    async def _start_server(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 picks a free port; report the real one
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+
+    def publish(self, state, viewer_fields, counter_fields):
+        # Called from the Tk thread with the full engine state and the fields changed since the
+        # last publish; the delta is built here and sent to every client on the server thread
+        delta = {"type": "delta", "length": len(state["counters"]), "counters": {}}
+        if viewer_fields:
+            delta["viewer"] = self._client_viewer(state["viewer"], viewer_fields)
+        for index, fields in counter_fields.items():
+            if index < len(state["counters"]):
+                counter = state["counters"][index]
+                delta["counters"][str(index)] = {name: counter[name] for name in fields}
+        self.loop.call_soon_threadsafe(self._broadcast, state, json.dumps(delta).encode("utf-8"))
+
+    def _client_viewer(self, viewer, fields):
+        # The page gets a URL for the background instead of a local file path
+        values = {name: viewer[name] for name in fields if name != "bg_image_path"}
+        if "bg_image_path" in fields or "bg_color" in fields:
+            path = viewer.get("bg_image_path", "")
+            values["bg_image"] = f"/background?v={hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}" if path else ""
+        return values
+
+    def _broadcast(self, state, payload):
+        self._state = state
+        frame = encode_frame(payload)
+        for writer in list(self._clients):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self._clients.discard(writer)
+                writer.close()
+            else:
+                writer.write(frame)
+
+    async def _serve(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            path = target.split("?", 1)[0]
+
+            if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(reader, writer, headers)
+            elif method != "GET":
+                self._respond(writer, "405 Method Not Allowed", "text/plain", b"Method not allowed")
+            elif path == "/":
+                self._respond(writer, "200 OK", "text/html; charset=utf-8", OVERLAY_PAGE.encode("utf-8"))
+            elif path == "/background":
+                await self._serve_background(writer)
+            else:
+                self._respond(writer, "404 Not Found", "text/plain", b"Not found")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._clients.discard(writer)
+
+    def _respond(self, writer, status, content_type, body):
+        writer.write((f"HTTP/1.1 {status}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      "Cache-Control: no-cache\r\n"
+                      "Connection: close\r\n\r\n").encode("latin-1") + body)
+
+    async def _serve_background(self, writer):
+        path = self._state["viewer"].get("bg_image_path", "")
+        if not path or not os.path.exists(path):
+            self._respond(writer, "404 Not Found", "text/plain", b"No background image")
+            return
+        with open(path, "rb") as f:
+            body = await self.loop.run_in_executor(None, f.read)
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self._respond(writer, "200 OK", content_type, body)
+
+    async def _serve_websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode("latin-1")).digest()).decode("latin-1")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("latin-1"))
+
+        viewer = self._state["viewer"]
+        snapshot = {"type": "state", "viewer": self._client_viewer(viewer, tuple(viewer)),
+                    "counters": self._state["counters"]}
+        writer.write(encode_frame(json.dumps(snapshot).encode("utf-8")))
+        self._clients.add(writer)
+
+        # Clients only send pings and close frames; everything else is ignored
+        while True:
+            opcode, payload = await read_frame(reader)
+            if opcode == 0x8:
+                writer.write(encode_frame(payload[:2], 0x8))
+                break
+            if opcode == 0x9:
+                writer.write(encode_frame(payload, 0xA))
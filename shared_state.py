@@ -0,0 +1,104 @@
+# Counter values in a small fixed-layout file that other local processes memory-map. Nothing here
+# imports the app, so a bot or overlay process can copy this one file and use SharedStateReader.
+#
+# Layout (little-endian): magic "SCST", u32 version, u64 sequence, u32 capacity, then the body:
+# u32 counter count and capacity i64 values. The writer makes the sequence odd while it updates the
+# body and even again afterwards (a seqlock), so readers retry instead of locking and never see a
+# torn update.
+#
+#   from shared_state import SharedStateReader
+#   reader = SharedStateReader("stream_counter_state.bin")
+#   sequence, counts = reader.read()
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"SCST"
+VERSION = 1
+HEADER = struct.Struct("<4sIQI")
+SEQUENCE_OFFSET = 8
+SEQUENCE = struct.Struct("<Q")
+DEFAULT_CAPACITY = 64
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+READ_TIMEOUT = 1.0  # Seconds a reader waits for an update to finish before giving up
+
+
+class SharedStateWriter:
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.sequence = 0
+        self._body = struct.Struct(f"<I{capacity}q")
+        size = HEADER.size + self._body.size
+        # Reuse an existing file of the right size so readers that already mapped it keep working
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            self._file = open(path, "r+b")
+        else:
+            self._file = open(path, "w+b")
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        magic, version, sequence, capacity = HEADER.unpack_from(self._map)
+        if magic == MAGIC and version == VERSION and capacity == self.capacity:
+            # Carry on from the previous run so readers never see the sequence go backwards
+            self.sequence = sequence + (sequence & 1)
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.sequence, self.capacity)
+
+    def publish(self, counts):
+        # Clamped before the sequence goes odd, so packing cannot fail halfway through an update
+        counts = [min(max(int(count), INT64_MIN), INT64_MAX) for count in counts[:self.capacity]]
+        self.sequence += 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+        self._body.pack_into(self._map, HEADER.size, len(counts), *counts, *[0] * (self.capacity - len(counts)))
+        self.sequence += 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class SharedStateReader:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, capacity = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a Stream Counter state file")
+        self._body = struct.Struct(f"<I{capacity}q")
+
+    def sequence(self):
+        # Cheap change check: the sequence only moves when the counts do
+        return SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+
+    def read(self, timeout=READ_TIMEOUT):
+        # Returns (sequence, [counts]) from a single consistent update. Raises TimeoutError if the
+        # file stays mid-update, e.g. because the writer was killed while publishing.
+        deadline = time.monotonic() + timeout
+        while True:
+            before = self.sequence()
+            if not before & 1:
+                count, *values = self._body.unpack_from(self._map, HEADER.size)
+                if self.sequence() == before:
+                    return before, values[:count]
+            if time.monotonic() > deadline:
+                raise TimeoutError("the state file was left mid-update; is Stream Counter still running?")
+            time.sleep(0)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def read_counts(path):
+    reader = SharedStateReader(path)
+    try:
+        return reader.read()[1]
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    import sys
+    print(" ".join(str(count) for count in read_counts(sys.argv[1] if len(sys.argv) > 1 else "stream_counter_state.bin")))
@@ -0,0 +1,54 @@
+import tkinter as tk
+from tkinter import ttk, filedialog
+
+REFRESH_MS = 500
+
+
+class StatsWindow:
+    # Live view of the instrumentation histograms and rates, with a JSON export
+    def __init__(self, app):
+        self.app = app
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Latency Stats")
+        self.window.geometry("520x420")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh_job = None
+
+        button_frame = ttk.Frame(self.window, padding="5")
+        button_frame.pack(fill="x")
+        ttk.Button(button_frame, text="Dump to JSON", command=self.dump).pack(side="left")
+        ttk.Button(button_frame, text="Reset", command=app.metrics.reset).pack(side="left", padx=5)
+
+        self.text = tk.Text(self.window, font=("Courier", 9), state="disabled")
+        self.text.pack(fill="both", expand=True, padx=5, pady=5)
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.app.metrics.snapshot()
+        lines = [f"{'stage':<16}{'count':>8}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (us)"]
+        for stage, stats in snapshot["stages"].items():
+            lines.append(f"{stage:<16}{stats['count']:>8}{stats['mean_us']:>9}{stats['p50_us']:>9}"
+                         f"{stats['p90_us']:>9}{stats['p99_us']:>9}{stats['max_us']:>9}")
+        lines.append("")
+        for name, rate in snapshot["per_second"].items():
+            lines.append(f"{name + ' per second':<20}{rate:>8}")
+        lines.append("")
+        for name, value in self.app.command_queue.stats().items():
+            lines.append(f"{'queue ' + name:<20}{value:>8}")
+
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.configure(state="disabled")
+        self.refresh_job = self.window.after(REFRESH_MS, self.refresh)
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.window.after_cancel(self.refresh_job)
+        self.window.destroy()
+
+    def dump(self):
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".json",
+                                            filetypes=[("JSON files", "*.json")])
+        if path:
+            self.app.metrics.dump(path, {"queue": self.app.command_queue.stats()})
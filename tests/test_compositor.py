@@ -0,0 +1,67 @@
+from PIL import Image, ImageChops
+
+from compositor import OverlayCompositor
+
+
+def items_for(count, color="#000000"):
+    return [(f"Deaths: {count}", ("Arial", 24), color, True),
+            (f"Today: {count // 3}", ("Arial", 18), "#ffffff", True),
+            ("Hidden", ("Arial", 18), "#ffffff", False)]
+
+
+def full_render(size, items, transparent=False, background=None):
+    return OverlayCompositor(size, transparent).render("#336699", background, 10, items)
+
+
+def assert_same(a, b):
+    assert a.size == b.size
+    assert ImageChops.difference(a, b).getbbox() is None
+
+
+def test_incremental_render_matches_full_render():
+    compositor = OverlayCompositor((320, 180))
+    for count in (0, 1, 9, 10, 11, 99, 100, 7, 1234, 0):
+        frame = compositor.render("#336699", None, 10, items_for(count))
+        assert_same(frame, full_render((320, 180), items_for(count)))
+
+
+def test_incremental_render_matches_after_color_and_visibility_changes():
+    compositor = OverlayCompositor((320, 180), transparent=True)
+    steps = [items_for(5), items_for(5, "#ff0000"), items_for(6, "#ff0000"),
+             [(text, font, color, True) for text, font, color, _ in items_for(6)]]
+    for items in steps:
+        frame = compositor.render("#336699", None, 10, items)
+        assert_same(frame, full_render((320, 180), items, transparent=True))
+
+
+def test_text_larger_than_frame():
+    items = [("A very long counter label: 123456", ("Arial", 40), "#000000", True)]
+    compositor = OverlayCompositor((60, 20))
+    compositor.render("#336699", None, 10, items)
+    frame = compositor.render("#336699", None, 10, [("A very long counter label: 123457",) + items[0][1:]])
+    assert_same(frame, full_render((60, 20), [("A very long counter label: 123457",) + items[0][1:]]))
+
+
+def test_background_source_is_not_resized(tmp_path):
+    from background import open_image
+    path = tmp_path / "bg.png"
+    Image.new("RGB", (1000, 500), "#00ff00").save(path)
+    source = open_image(str(path))
+    OverlayCompositor((640, 360)).render("#336699", source, 10, items_for(1))
+    # The viewer's shared source only grows with the sizes the viewer itself asks for
+    assert source._largest == (0, 0)
+
+
+def test_font_index_is_cached_and_switches_fonts(tmp_path):
+    from compositor import FontIndex
+    cache_path = str(tmp_path / "font_files.json")
+    index = FontIndex(cache_path)
+    assert index.wait(30)
+    cached = FontIndex(cache_path)
+    assert cached.wait(30)
+    assert cached.files == index.files
+
+    compositor = OverlayCompositor((320, 180), font_index=index)
+    assert compositor.fonts_changed()
+    compositor.render("#336699", None, 10, items_for(3))
+    assert not compositor.fonts_changed()
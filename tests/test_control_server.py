@@ -0,0 +1,80 @@
+import json
+import socket
+
+from command_queue import CommandQueue
+from control_server import ControlServer
+
+
+def start_server(queue):
+    server = ControlServer(queue, "127.0.0.1", 0)
+    server.start()
+    server.counts = (3, 5)
+    server.profiles = ("Default", "Elden Ring")
+    return server
+
+
+def send_lines(port, lines):
+    # Sends the lines, then reads replies until the server closes the connection
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall("".join(line + "\n" for line in lines).encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+        data = b""
+        while chunk := sock.recv(65536):
+            data += chunk
+    return data.decode("utf-8").splitlines()
+
+
+def test_text_commands_and_get_fold():
+    queue = CommandQueue()
+    server = start_server(queue)
+    try:
+        replies = send_lines(server.port, ["inc 1", "dec 2 3", "reset all", "set 2 40; get", "dec all 100; get 2",
+                                           "inc 3", "inc 1 x", "get"])
+    finally:
+        server.stop()
+    assert replies == ["ok", "ok", "ok", "3 40", "0", "error no counter 3"]
+    # The invalid line ends the connection, so the "get" after it is never answered
+    assert queue.drain() == [("add", 0, 1), ("add", 1, -3), ("set", 0, 0), ("set", 1, 0), ("set", 1, 40),
+                             ("add", 0, -100), ("add", 1, -100)]
+
+
+def test_json_commands_and_all_or_nothing_batch():
+    queue = CommandQueue()
+    server = start_server(queue)
+    try:
+        lines = [{"op": "add", "counter": 1, "amount": 5},
+                 {"op": "batch", "commands": [{"op": "set", "counter": [1, 2], "value": 7}, {"op": "get"}]},
+                 [{"op": "reset", "counter": "all"}, {"op": "get", "counter": 2}],
+                 {"op": "batch", "commands": [{"op": "add", "counter": 1}, {"op": "add", "counter": 9}]}]
+        replies = [json.loads(reply) for reply in send_lines(server.port, [json.dumps(line) for line in lines])]
+    finally:
+        server.stop()
+    assert replies[:3] == [{"ok": True}, {"ok": True, "counts": [7, 7]}, {"ok": True, "counts": [0]}]
+    assert replies[3] == {"ok": False, "error": "no counter 9"}
+    # Nothing from the failed batch was queued, not even its valid first command
+    assert queue.drain() == [("add", 0, 5), ("set", 0, 7), ("set", 1, 7), ("set", 0, 0), ("set", 1, 0)]
+
+
+def test_get_after_profile_is_rejected():
+    queue = CommandQueue()
+    server = start_server(queue)
+    try:
+        assert server.execute("get; profile Elden Ring") == "3 5"
+        assert server.execute("profile next; get").startswith("error")
+        assert json.loads(server.execute('[{"op": "profile", "name": "Default"}, {"op": "get"}]'))["ok"] is False
+        assert server.execute("profile nope").startswith("error")
+    finally:
+        server.stop()
+    assert queue.drain() == [("profile", "Elden Ring", 0)]
+
+
+def test_http_request_line_closes_the_connection():
+    queue = CommandQueue()
+    server = start_server(queue)
+    try:
+        request = ["POST / HTTP/1.1", "Host: 127.0.0.1", "Content-Type: text/plain", "", "reset all"]
+        replies = send_lines(server.port, request)
+    finally:
+        server.stop()
+    assert len(replies) == 1 and replies[0].startswith("error unknown command")
+    assert queue.drain() == []
@@ -0,0 +1,85 @@
+from hotkeys import HotkeyTable
+
+HOTKEYS = {
+    "counter1_increment": {"ctrl": True, "shift": True, "alt": False, "key": "Key.f1"},
+    "counter1_decrement": {"ctrl": True, "shift": False, "alt": False, "key": "Key.f2"},
+    "counter1_reset": {"ctrl": False, "shift": False, "alt": False, "key": "Key.f3"},
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_table(repeat_policy="ignore"):
+    clock = Clock()
+    table = HotkeyTable(repeat_policy, stale_after=2.0, clock=clock)
+    table.compile(HOTKEYS)
+    return table, clock
+
+
+def test_press_fires_once_per_physical_press():
+    table, clock = make_table()
+    table.press("Key.ctrl_l")
+    table.press("Key.shift_l")
+    assert table.press("Key.f1") == "counter1_increment"
+    table.release("Key.f1")
+    clock.now = 0.1
+    assert table.press("Key.f1") == "counter1_increment"
+    # Wrong modifiers and unbound keys give nothing
+    assert table.press("Key.f2") is None
+    assert table.press("a") is None
+
+
+def test_auto_repeat_is_ignored_unless_the_policy_repeats():
+    table, clock = make_table("ignore")
+    assert table.press("Key.f3") == "counter1_reset"
+    for step in range(1, 20):
+        clock.now = step * 0.03
+        assert table.press("Key.f3") is None
+    table.release("Key.f3")
+    assert table.press("Key.f3") == "counter1_reset"
+
+    table, clock = make_table("repeat")
+    assert table.press("Key.f3") == "counter1_reset"
+    clock.now = 0.03
+    assert table.press("Key.f3") == "counter1_reset"
+
+
+def test_stale_modifier_is_dropped_only_without_a_full_binding():
+    # Ctrl's key-up was missed: F3 alone still fires once ctrl has gone stale, and ctrl is forgotten
+    table, clock = make_table()
+    table.press("Key.ctrl_l")
+    assert table.press("Key.f3") is None  # Ctrl is fresh, so it is believed
+    table.release("Key.f3")
+    clock.now = 3.0
+    assert table.press("Key.f3") == "counter1_reset"
+    assert table.modifiers() == 0
+
+    # Ctrl+F2 is bound, so a stale ctrl is still trusted for it
+    table, clock = make_table()
+    table.press("Key.ctrl_l")
+    clock.now = 3.0
+    assert table.press("Key.f2") == "counter1_decrement"
+    assert table.modifiers() != 0
+
+    # Only stale modifiers are dropped: a fresh shift still blocks F3
+    clock.now = 3.5
+    table.press("Key.shift_l")
+    assert table.press("Key.f3") is None
+
+
+def test_modifiers_held_longer_than_stale_after():
+    # Ctrl+Shift really held down through several taps; they stop repeating once F1 is pressed
+    table, clock = make_table()
+    table.press("Key.ctrl_l")
+    table.press("Key.shift_l")
+    for step in range(1, 6):
+        clock.now = step * 1.5
+        assert table.press("Key.f1") == "counter1_increment"
+        table.release("Key.f1")
+    assert table.modifiers() != 0
@@ -0,0 +1,54 @@
+import json
+import os
+
+from journal import CounterJournal, write_atomic
+
+
+def write_entries(path, values):
+    journal = CounterJournal(str(path))
+    for counter, value in values:
+        journal.record(counter, value)
+    journal.close()
+
+
+def test_replay_skips_a_truncated_last_line_and_record_continues(tmp_path):
+    path = tmp_path / "counts.journal"
+    write_entries(path, [(0, 1), (1, 5), (0, 2), (0, 3)])
+    data = path.read_bytes()
+    last = len(data.splitlines()[-1]) + 1
+    path.write_bytes(data[:len(data) - last // 2])  # Crash halfway through the last entry
+
+    journal = CounterJournal(str(path))
+    assert journal.replay() == {0: 2, 1: 5}
+    assert journal.entries == 3
+    journal.record(1, 6)
+    journal.close()
+
+    reopened = CounterJournal(str(path))
+    assert reopened.replay() == {0: 2, 1: 6}
+    assert reopened.entries == 4
+    # The torn line stays on a line of its own rather than swallowing the next entry
+    assert len(path.read_text().splitlines()) == 5
+
+
+def test_clear_after_snapshot(tmp_path):
+    path = tmp_path / "counts.journal"
+    snapshot_path = tmp_path / "settings.json"
+    journal = CounterJournal(str(path), compact_after=3)
+    journal.replay()
+    for value in range(1, 4):
+        journal.record(0, value)
+    journal.sync(force=True)
+    assert journal.needs_compaction()
+
+    write_atomic(str(snapshot_path), json.dumps({"counts": [3]}))
+    journal.clear()
+    assert not os.path.exists(path)
+    assert not journal.needs_compaction()
+    assert CounterJournal(str(path)).replay() == {}
+
+    # Entries after the snapshot start a new journal
+    journal.record(0, 4)
+    journal.close()
+    assert CounterJournal(str(path)).replay() == {0: 4}
+    assert json.loads(snapshot_path.read_text()) == {"counts": [3]}
@@ -0,0 +1,110 @@
+import base64
+import json
+import os
+import socket
+import struct
+import time
+
+from overlay_server import OverlayServer, encode_frame
+
+STATE = {
+    "viewer": {"bg_color": "#ffffff", "bg_image_path": "", "spacing": 10, "auto_fit": False},
+    "counters": [{"label_text": "Deaths:", "count": 3, "font_color": "#000000", "font_size": 12,
+                  "font_family": "Arial", "include_in_viewer": True, "rollover": "none"}],
+}
+
+
+def start_server():
+    server = OverlayServer("127.0.0.1", 0)
+    server.start()
+    server.publish(STATE, tuple(STATE["viewer"]), {0: tuple(STATE["counters"][0])})
+    return server
+
+
+def http_get(port, path):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+        response = b""
+        while chunk := sock.recv(65536):
+            response += chunk
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b"\r\n")[0].decode("latin-1"), body
+
+
+def read_message(sock):
+    first, second = sock.recv(2, socket.MSG_WAITALL)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", sock.recv(2, socket.MSG_WAITALL))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", sock.recv(8, socket.MSG_WAITALL))[0]
+    return first & 0x0F, sock.recv(length, socket.MSG_WAITALL)
+
+
+def open_websocket(port):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    key = base64.b64encode(os.urandom(16)).decode("latin-1")
+    sock.sendall((f"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode("latin-1"))
+    head = b""
+    while not head.endswith(b"\r\n\r\n"):
+        head += sock.recv(1)
+    assert head.startswith(b"HTTP/1.1 101")
+    return sock
+
+
+def test_serves_page_and_404():
+    server = start_server()
+    try:
+        status, body = http_get(server.port, "/")
+        assert status == "HTTP/1.1 200 OK"
+        assert b"Stream Counter Overlay" in body
+        assert http_get(server.port, "/missing")[0] == "HTTP/1.1 404 Not Found"
+        assert http_get(server.port, "/background")[0] == "HTTP/1.1 404 Not Found"
+    finally:
+        server.stop()
+
+
+def test_websocket_gets_state_then_deltas():
+    server = start_server()
+    try:
+        with open_websocket(server.port) as sock:
+            opcode, payload = read_message(sock)
+            snapshot = json.loads(payload)
+            assert opcode == 0x1
+            assert snapshot["type"] == "state"
+            assert snapshot["counters"][0]["count"] == 3
+
+            state = {"viewer": STATE["viewer"], "counters": [dict(STATE["counters"][0], count=4)]}
+            server.publish(state, (), {0: ("count",)})
+            delta = json.loads(read_message(sock)[1])
+            assert delta == {"type": "delta", "length": 1, "counters": {"0": {"count": 4}}}
+
+            # Pings are answered; a close frame is echoed
+            sock.sendall(encode_frame(b"hi", 0x9))
+            assert read_message(sock) == (0xA, b"hi")
+    finally:
+        server.stop()
+
+
+def test_stop_with_connected_clients_leaves_no_pending_tasks(caplog):
+    server = start_server()
+    clients = [open_websocket(server.port) for _ in range(3)]
+    idle = socket.create_connection(("127.0.0.1", server.port), timeout=5)  # Never sends its request
+    try:
+        for sock in clients:
+            read_message(sock)
+        deadline = time.monotonic() + 5
+        while len(server._tasks) < len(clients) + 1 and time.monotonic() < deadline:
+            time.sleep(0.01)  # Until the idle connection's handler is waiting for its request
+        server.stop()
+        assert not server._tasks
+        assert not server._thread.is_alive()
+        assert server.loop.is_closed()
+        for sock in clients:
+            assert sock.recv(1) == b""  # Closed by the server
+    finally:
+        for sock in clients + [idle]:
+            sock.close()
+    # asyncio reports pending or failed tasks through its logger
+    assert not [record for record in caplog.records if record.name == "asyncio"]
@@ -0,0 +1,39 @@
+import os
+import time
+from journal import write_atomic
+
+
+class TextFileOutput:
+    # Writes each counter's "{label} {count}" to its own file for OBS "Text (read from file)" sources.
+    # A change is held for up to debounce_ms so bursts collapse into one write of the latest text.
+    def __init__(self, directory, debounce_ms=100):
+        self.directory = directory
+        self.debounce = debounce_ms / 1000
+        self._written = {}
+        self._pending = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, index):
+        return os.path.join(self.directory, f"counter{index + 1}.txt")
+
+    def update(self, index, text):
+        if self._written.get(index) == text:
+            self._pending.pop(index, None)
+        elif index in self._pending:
+            self._pending[index][0] = text
+        else:
+            self._pending[index] = [text, time.monotonic()]
+
+    def flush(self, force=False):
+        if not self._pending:
+            return
+        now = time.monotonic()
+        for index, (text, since) in list(self._pending.items()):
+            if force or now - since >= self.debounce:
+                try:
+                    write_atomic(self.path(index), text, fsync=False)
+                except PermissionError:
+                    # Windows refuses the rename while OBS has the file open; retry next frame
+                    continue
+                self._written[index] = text
+                del self._pending[index]
@@ -0,0 +1,84 @@
+# The lifecycle shared by the overlay and control servers: an asyncio server on its own loop and
+# daemon thread, started and stopped from the Tk thread. Subclasses open the server in
+# _start_server() and serve each connection in _serve().
+import asyncio
+import threading
+
+
+class ThreadedServer:
+    def __init__(self):
+        self.loop = None
+        self.error = None
+        self._server = None
+        self._tasks = set()  # Connection handlers, cancelled on stop
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self.error:
+            raise self.error
+
+    def stop(self):
+        if self.loop and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+            self._thread.join(timeout=2)
+
+    async def _shutdown(self):
+        # Stop accepting, then cancel the connection handlers and let their cleanup run, so no task
+        # is still pending when the loop closes
+        self._server.close()
+        # Closed transports release their sockets on a later pass, so keep going until no handler
+        # is left
+        while self._tasks:
+            tasks = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(0)
+        try:
+            await asyncio.wait_for(self._server.wait_closed(), 1)
+        except asyncio.TimeoutError:
+            pass
+        self.loop.stop()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(self._start_server())
+        except OSError as e:
+            self.error = e
+            self.loop.close()
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+            self._closed()
+
+    async def _start_server(self):
+        # Returns the asyncio server, with _handle as its connection callback
+        raise NotImplementedError
+
+    def _closed(self):
+        # Runs on the server thread once the loop has closed
+        pass
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            await self._serve(reader, writer)
+        except asyncio.CancelledError:
+            pass  # Cancelled by stop(); ending normally keeps the stream's callback quiet on 3.11
+        finally:
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _serve(self, reader, writer):
+        raise NotImplementedError
@@ -0,0 +1,55 @@
+import tkinter as tk
+
+
+class ViewerRenderer:
+    # Applies viewer state to the display labels, sending only the Tk calls for values that changed
+    def __init__(self, canvas, label_frame):
+        self.canvas = canvas
+        self.label_frame = label_frame
+        self.labels = []
+        self.invalidate()
+
+    def invalidate(self):
+        # Forget what has been applied so the next render reconfigures everything
+        self._applied = [{} for _ in self.labels]
+        self._bg = None
+        self._layout = None
+
+    def _set_label_count(self, count):
+        # One label per counter; created or destroyed only when counters are added or removed
+        while len(self.labels) < count:
+            self.labels.append(tk.Label(self.label_frame))
+            self._applied.append({})
+        while len(self.labels) > count:
+            self.labels.pop().destroy()
+            self._applied.pop()
+        self._layout = None
+
+    def render(self, bg, spacing, items):
+        # items holds one (text, font, fg, visible) tuple per label
+        if len(items) != len(self.labels):
+            self._set_label_count(len(items))
+
+        for label, applied, (text, font, fg, visible) in zip(self.labels, self._applied, items):
+            changes = {}
+            for option, value in (("text", text), ("font", font), ("fg", fg), ("bg", bg)):
+                if applied.get(option) != value:
+                    applied[option] = value
+                    changes[option] = value
+            if changes:
+                label.configure(**changes)
+
+        if bg != self._bg:
+            self._bg = bg
+            self.canvas.configure(bg=bg)
+            self.label_frame.configure(bg=bg)
+
+        # Repack only when spacing or visibility changed
+        layout = (spacing, tuple(item[3] for item in items))
+        if layout != self._layout:
+            self._layout = layout
+            for label in self.labels:
+                label.pack_forget()
+            for label, item in zip(self.labels, items):
+                if item[3]:
+                    label.pack(pady=spacing)
@@ -0,0 +1,101 @@
+import time
+import tkinter as tk
+
+from viewer import ViewerRenderer
+
+
+class ViewerWindow:
+    # The viewer in its own small (optionally borderless) window for OBS window capture. Engine
+    # changes only mark it dirty; a fixed-rate loop applies them, labels first, and leaves the
+    # background for a later tick when the frame's time budget is already spent.
+    def __init__(self, app, settings, on_close):
+        self.app = app
+        self.settings = settings
+        self.on_close = on_close
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Stream Counter Viewer")
+        self.window.geometry(settings["geometry"])
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        if settings["borderless"]:
+            self.window.overrideredirect(True)
+            # Without a title bar the window is moved by dragging it anywhere
+            self.window.bind("<ButtonPress-1>", self.start_move)
+            self.window.bind("<B1-Motion>", self.move)
+            self.window.bind("<Double-Button-1>", lambda e: self.close())
+
+        self.canvas = tk.Canvas(self.window, highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self.label_frame = tk.Frame(self.canvas)
+        self.label_frame_id = self.canvas.create_window(0, 0, window=self.label_frame, anchor="center")
+        self.renderer = ViewerRenderer(self.canvas, self.label_frame)
+        self.bg_image_id = None
+        self.bg_photo = None
+        self.size = (200, 100)
+
+        self.interval = 1.0 / max(1, settings["fps"])
+        self.budget = settings["budget_ms"] / 1000
+        self.labels_dirty = True
+        self.background_dirty = True
+        self.frame_job = None
+        self.canvas.bind("<Configure>", self.on_configure)
+        app.engine.subscribe(self.on_engine_change)
+        self.render_frame()
+
+    def on_engine_change(self, index, fields):
+        self.labels_dirty = True
+        if index is None and ("bg_image_path" in fields or "bg_color" in fields):
+            self.background_dirty = True
+
+    def on_configure(self, event):
+        self.size = (event.width, event.height)
+        self.canvas.coords(self.label_frame_id, event.width / 2, event.height / 2)
+        self.labels_dirty = True
+        self.background_dirty = True
+
+    def render_frame(self):
+        started = time.perf_counter()
+        if self.labels_dirty:
+            self.labels_dirty = False
+            chroma_key = self.settings["chroma_key"]
+            self.renderer.render(chroma_key or self.app.engine.viewer["bg_color"], self.app.engine.viewer["spacing"],
+                                 self.app.viewer_items(self.size))
+        if self.background_dirty and time.perf_counter() - started < self.budget:
+            self.background_dirty = False
+            self.update_background()
+        # Fixed rate: the next frame starts one interval after this one started
+        elapsed = time.perf_counter() - started
+        self.frame_job = self.window.after(max(1, int((self.interval - elapsed) * 1000)), self.render_frame)
+
+    def update_background(self):
+        # A chroma key replaces the background image so the whole window can be keyed out.
+        # Animated backgrounds show their first frame here; they play in the embedded viewer.
+        source = self.app.bg_image
+        if source is None or self.settings["chroma_key"]:
+            if self.bg_image_id is not None:
+                self.canvas.delete(self.bg_image_id)
+                self.bg_image_id = None
+                self.bg_photo = None
+            return
+        self.bg_photo = self.app.bg_cache.get(source, self.size)
+        if self.bg_image_id is None:
+            self.bg_image_id = self.canvas.create_image(0, 0, image=self.bg_photo, anchor="nw")
+            self.canvas.tag_raise(self.label_frame_id)
+        else:
+            self.canvas.itemconfigure(self.bg_image_id, image=self.bg_photo)
+
+    def start_move(self, event):
+        self._drag_from = (event.x_root - self.window.winfo_x(), event.y_root - self.window.winfo_y())
+
+    def move(self, event):
+        self.window.geometry(f"+{event.x_root - self._drag_from[0]}+{event.y_root - self._drag_from[1]}")
+
+    def geometry(self):
+        return f"{self.window.winfo_width()}x{self.window.winfo_height()}+{self.window.winfo_x()}+{self.window.winfo_y()}"
+
+    def close(self):
+        self.settings["geometry"] = self.geometry()
+        if self.frame_job is not None:
+            self.window.after_cancel(self.frame_job)
+        self.app.engine.unsubscribe(self.on_engine_change)
+        self.window.destroy()
+        self.on_close()